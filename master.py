@@ -74,6 +74,7 @@ def run_last_week():
         print(f"[{parser.name}] new: {len(records)}")
         total += len(records)
 
+    storage.close()
     print(f"TOTAL new records saved: {total}")
 
 
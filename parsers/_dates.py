@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime
+from typing import Optional
+
+from dateutil import parser as dparser
+
+
+_MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8,
+    "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+# форматы, которые реально встречаются на сайтах; строка должна совпасть целиком,
+# всё остальное (и невалидные даты) - через dateutil
+_FAST_ISO_RE = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})"
+    r"(?:[T ](\d{2}):(\d{2})(?::(\d{2}))?(?:Z|[+-]\d{2}:?\d{2})?)?"
+)
+_FAST_MDY_RE = re.compile(r"([A-Za-z]+)\.? (\d{1,2}), (\d{4})")
+_FAST_DMY_RE = re.compile(r"(\d{1,2}) ([A-Za-z]+)\.? (\d{4})")
+
+
+def parse_date(s: str) -> Optional[datetime]:
+
+    # наивный datetime; смещение отбрасывается - как dt.replace(tzinfo=None) после dateutil
+    try:
+        m = _FAST_ISO_RE.fullmatch(s)
+        if m:
+            y, mo, d, hh, mm, ss = m.groups()
+            return datetime(int(y), int(mo), int(d), int(hh or 0), int(mm or 0), int(ss or 0))
+
+        m = _FAST_MDY_RE.fullmatch(s)
+        if m:
+            mo = _MONTHS.get(m.group(1).lower())
+            if mo:
+                return datetime(int(m.group(3)), mo, int(m.group(2)))
+
+        m = _FAST_DMY_RE.fullmatch(s)
+        if m:
+            mo = _MONTHS.get(m.group(2).lower())
+            if mo:
+                return datetime(int(m.group(3)), mo, int(m.group(1)))
+    except ValueError:
+        pass
+
+    try:
+        dt = dparser.parse(s, fuzzy=True)
+    except Exception:
+        return None
+    return dt.replace(tzinfo=None) if dt.tzinfo else dt
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from lxml import etree
+from lxml import html as lxml_html
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+from storage.local import LocalStorage
+
+
+# листинги почти не меняются между запусками: держим тело в памяти 5 минут,
+# а на диске - вместе с ETag / Last-Modified для условного GET
+LISTING_TTL_S = 300.0
+
+_LISTING_MEM: Dict[Tuple[str, str], Tuple[float, str]] = {}
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/124.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def build_adapter(retries: bool = False) -> HTTPAdapter:
+    # парсеры со своими циклами tries (BoE, NBKZ) берут адаптер без повторов, иначе попытки
+    # перемножаются; у кого цикла нет (HTTP_RETRIES = True) - повторы делает urllib3
+    if not retries:
+        return HTTPAdapter(pool_connections=32, pool_maxsize=32)
+    return HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["HEAD", "GET"],
+        ),
+    )
+
+
+def build_session(
+    headers: Optional[Dict[str, str]] = None,
+    adapter: Optional[HTTPAdapter] = None,
+) -> requests.Session:
+
+    # заголовки у каждого парсера свои (User-Agent, Accept-Language под сайт);
+    # пул соединений можно разделить между сессиями, передав общий adapter
+    s = requests.Session()
+
+    adapter = adapter or build_adapter()
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+
+    s.headers.update({"Connection": "keep-alive"})
+    s.headers.update(headers or DEFAULT_HEADERS)
+    return s
+
+
+# тексты страниц уже декодированы как utf-8; отдаём lxml байты с явной кодировкой,
+# иначе строка с <?xml ... encoding=...?> в начале не парсится.
+# Объект парсера lxml не параллелится (общий на все потоки сериализует разбор) -
+# держим по одному на поток.
+_TLS = threading.local()
+
+
+def _html_parser() -> lxml_html.HTMLParser:
+    p = getattr(_TLS, "parser", None)
+    if p is None:
+        p = _TLS.parser = lxml_html.HTMLParser(encoding="utf-8", recover=True, huge_tree=False)
+    return p
+
+
+def html_root(html: str) -> Optional[etree._Element]:
+    try:
+        return lxml_html.fromstring(html.encode("utf-8"), parser=_html_parser())
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def collapse_ws(s: str) -> str:
+    # то же, что re.sub(r"\s+", " ", s.strip()): split() без аргументов режет
+    # по тем же пробельным символам, но целиком в C
+    return " ".join((s or "").split())
+
+
+def node_text(el: etree._Element, sep: str = "") -> str:
+
+    # то же, что BeautifulSoup get_text(sep, strip=True)
+    return sep.join(t.strip() for t in el.itertext() if t.strip())
+
+
+def capped_join(parts: Iterable[str], sep: str, cap: int) -> str:
+
+    # то же, что sep.join(parts)[:cap], но генератор строк не дочитывается
+    # дальше нужного - длинные страницы целиком в строку не собираются
+    acc: List[str] = []
+    n = 0
+    for t in parts:
+        acc.append(t)
+        n += len(t) + len(sep)
+        if n >= cap:
+            break
+    return sep.join(acc)[:cap]
+
+
+def first_by_priority(hits: list, sels: list) -> list:
+
+    # hits - результат одного прохода по дереву объединённым селектором;
+    # из них по каждому селектору из sels (в порядке приоритета) - первый подходящий
+    out = []
+    for sel in sels:
+        for el in hits:
+            if sel.match(el):
+                out.append(el)
+                break
+    return out
+
+
+class RateLimiter:
+
+    # не чаще одного запроса в interval секунд на все потоки парсера:
+    # при параллельной загрузке вежливость к сайту остаётся прежней,
+    # а ожидание ответов перекрывается
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next_at)
+            self._next_at = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+def read_text_capped(r: requests.Response, max_bytes: int) -> str:
+
+    # тело читается потоком и обрезается на входе: мегабайты навигации и скриптов
+    # в конце страницы не скачиваются и не попадают в парсер
+    buf = bytearray()
+    try:
+        for chunk in r.iter_content(chunk_size=256 * 1024):
+            buf.extend(chunk)
+            if len(buf) >= max_bytes:
+                del buf[max_bytes:]
+                break
+    finally:
+        r.close()
+    return buf.decode("utf-8", "replace")
+
+
+def head(sess: requests.Session, url: str, timeout: float = 10) -> Tuple[Optional[int], Optional[str], Optional[str]]:
+
+    # (Content-Length, ETag, Last-Modified); при любой ошибке - (None, None, None),
+    # и вызывающий код просто качает файл как раньше
+    try:
+        r = sess.head(url, allow_redirects=True, timeout=timeout)
+        if r.status_code >= 400:
+            return None, None, None
+        length = r.headers.get("Content-Length")
+        return (
+            int(length) if length and length.isdigit() else None,
+            r.headers.get("ETag"),
+            r.headers.get("Last-Modified"),
+        )
+    except Exception:
+        return None, None, None
+
+
+def get_listing_html(
+    sess: requests.Session,
+    url: str,
+    storage: LocalStorage,
+    source: str,
+    timeout: float = 30,
+) -> Optional[str]:
+
+    key = (source, url)
+    now = time.monotonic()
+
+    hit = _LISTING_MEM.get(key)
+    if hit:
+        if now - hit[0] < LISTING_TTL_S:
+            return hit[1]
+        _LISTING_MEM.pop(key, None)
+
+    cached = storage.get_cached_page(source, url)
+    headers: Dict[str, str] = {}
+    if cached:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    r = sess.get(url, headers=headers, timeout=timeout)
+    if r.status_code == 304 and cached:
+        html = cached[2]
+    else:
+        r.raise_for_status()
+        r.encoding = "utf-8"
+        html = r.text
+
+        etag = r.headers.get("ETag")
+        last_modified = r.headers.get("Last-Modified")
+        if etag or last_modified:
+            storage.put_cached_page(source, url, html, etag, last_modified)
+
+    # заодно выкидываем протухшие чужие листинги, чтобы кеш не рос в недельном режиме;
+    # list() - снимок, словарь могут менять другие потоки
+    for k, (ts, _) in list(_LISTING_MEM.items()):
+        if now - ts >= LISTING_TTL_S:
+            _LISTING_MEM.pop(k, None)
+    _LISTING_MEM[key] = (now, html)
+    return html
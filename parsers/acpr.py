@@ -11,6 +11,7 @@ import requests
 from bs4 import BeautifulSoup
 
 from parsers.base import DocumentRecord
+from parsers._http import build_session
 from storage.local import LocalStorage
 
 
@@ -64,16 +65,17 @@ class ACPRParser:
 
     name = "acpr"
 
-    def __init__(self, sleep_s: float = 0.2, max_pages: int = 30):
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari",
+    }
+
+    def __init__(self, sleep_s: float = 0.2, max_pages: int = 30, session: Optional[requests.Session] = None):
         self.base_url = "https://acpr.banque-france.fr"
         self.news_url = "https://acpr.banque-france.fr/en/news"
         self.sleep_s = sleep_s
         self.max_pages = max_pages
 
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari"
-        })
+        self.session = session or build_session(self.HEADERS)
 
     def _get_page(self, url: str) -> Optional[str]:
         try:
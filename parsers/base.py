@@ -20,4 +20,4 @@ class DocumentRecord:
 
     pdf_urls: List[str]
 
-    meta: Dict[str, Any]
\ No newline at end of file
+    meta: Dict[str, Any]
@@ -13,19 +13,25 @@ from bs4 import BeautifulSoup
 from storage.local import LocalStorage
 from parsers.base import DocumentRecord
 from parsers.record_factory import make_record
+from parsers._http import build_session
 
 
 class BDESpainParser:
 
     name = "bde"
 
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
+        "Accept-Language": "en,en-US;q=0.9,es;q=0.8",
+    }
+
     DROP_QUERY_KEYS = {
         "_", "ts", "timestamp", "t", "v", "ver", "version",
         "cb", "cachebust", "cachebuster", "nocache", "rnd", "random",
         "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
     }
 
-    def __init__(self, sleep_s: float = 0.2, max_pages: int = 10, limit: int = 50):
+    def __init__(self, sleep_s: float = 0.2, max_pages: int = 10, limit: int = 50, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.max_pages = max_pages
         self.limit = limit
@@ -33,11 +39,7 @@ class BDESpainParser:
         self.base_url = "https://www.bde.es"
         self.list_url = "https://www.bde.es/wbe/en/inicio/noticias/"
 
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
-            "Accept-Language": "en,en-US;q=0.9,es;q=0.8",
-        })
+        self.session = session or build_session(self.HEADERS)
 
 
     # helpers
@@ -13,21 +13,13 @@ from dateutil import parser as dparser
 
 from parsers.base import DocumentRecord
 from parsers.record_factory import make_record
+from parsers._http import build_session
 from storage.local import LocalStorage
 
 
 SLEEP_DEFAULT = 0.2
 
 
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-    })
-    return s
-
-
 def _clean(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "").strip())
 
@@ -43,14 +35,19 @@ class BNMParser:
 
     name = "bnm"
 
-    def __init__(self, sleep_s: float = SLEEP_DEFAULT, max_pages: int = 5):
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+
+    def __init__(self, sleep_s: float = SLEEP_DEFAULT, max_pages: int = 5, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.max_pages = max_pages
 
         self.base_url = "https://www.bnm.md"
         self.list_url = "https://www.bnm.md/en/search?partitions%5B0%5D=677&post_types%5B677%5D%5B0%5D=834"
 
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS)
 
 
 
@@ -14,6 +14,7 @@ from bs4 import BeautifulSoup
 from storage.local import LocalStorage
 from parsers.base import DocumentRecord
 from parsers.record_factory import make_record
+from parsers._http import build_session
 
 
 class BoCParser:
@@ -21,6 +22,11 @@ class BoCParser:
 
     name = "boc"
 
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
+        "Accept-Language": "en,en-US;q=0.9,fr;q=0.8",
+    }
+
 
     DROP_QUERY_KEYS = {
         "_", "ts", "timestamp", "t", "v", "ver", "version",
@@ -29,7 +35,7 @@ class BoCParser:
         "download",
     }
 
-    def __init__(self, sleep_s: float = 0.2, max_pages: int = 20, limit: int = 0):
+    def __init__(self, sleep_s: float = 0.2, max_pages: int = 20, limit: int = 0, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.max_pages = max_pages
         self.limit = limit  
@@ -37,13 +43,7 @@ class BoCParser:
         self.base_url = "https://www.bankofcanada.ca"
         self.source_url = "https://www.bankofcanada.ca/news/?utility[]=790"
 
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
-                "Accept-Language": "en,en-US;q=0.9,fr;q=0.8",
-            }
-        )
+        self.session = session or build_session(self.HEADERS)
 
 
     # helpers
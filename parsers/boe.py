@@ -13,6 +13,8 @@ import requests
 from bs4 import BeautifulSoup
 from dateutil import parser as dparser
 
+from parsers._http import build_session
+
 
 @dataclass
 class DocumentRecord:
@@ -35,7 +37,12 @@ class BoEParser:
 
     name = "boe"
 
-    def __init__(self, sleep_s: float = 0.2, max_items: int = 200, debug: bool = False):
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+        "Accept-Language": "en,ru;q=0.9",
+    }
+
+    def __init__(self, sleep_s: float = 0.2, max_items: int = 200, debug: bool = False, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.max_items = max_items
         self.debug = debug
@@ -43,11 +50,7 @@ class BoEParser:
         self.rss_url = "https://www.bankofengland.co.uk/rss/news"
         self.base = "https://www.bankofengland.co.uk"
 
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
-            "Accept-Language": "en,ru;q=0.9",
-        })
+        self.session = session or build_session(self.HEADERS)
 
         self.MAX_PDF = 3
 
@@ -12,15 +12,7 @@ from bs4 import BeautifulSoup
 from storage.local import LocalStorage
 from parsers.record_factory import make_record
 from parsers.base import DocumentRecord
-
-
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-    })
-    return s
+from parsers._http import build_session
 
 
 def _clean(s: str) -> str:
@@ -44,7 +36,12 @@ class BOKParser:
 
     name = "bok"
 
-    def __init__(self, sleep_s: float = 0.25, max_pages: int = 20, page_unit: int = 100):
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+
+    def __init__(self, sleep_s: float = 0.25, max_pages: int = 20, page_unit: int = 100, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.max_pages = max_pages
         self.page_unit = page_unit
@@ -54,7 +51,7 @@ class BOKParser:
             f"{self.base_url}/eng/singl/newsDataEng/listCont.do"
             f"?targetDepth=3&menuNo=400423&searchCnd=1&pageUnit={self.page_unit}"
         )
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS)
 
 
     def _get_html(self, url: str, tries: int = 3) -> Optional[str]:
@@ -14,6 +14,7 @@ from bs4 import BeautifulSoup
 from storage.local import LocalStorage
 from parsers.base import DocumentRecord
 from parsers.record_factory import make_record
+from parsers._http import build_session
 
 
 class CBAArmeniaParser:
@@ -21,6 +22,11 @@ class CBAArmeniaParser:
 
     name = "cba_armenia"
 
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
+        "Accept-Language": "en,en-US;q=0.9",
+    }
+
     DROP_QUERY_KEYS = {
         "_", "ts", "timestamp", "t", "v", "ver", "version",
         "cb", "cachebust", "cachebuster", "nocache", "rnd", "random",
@@ -28,18 +34,12 @@ class CBAArmeniaParser:
         "download",
     }
 
-    def __init__(self, sleep_s: float = 0.2):
+    def __init__(self, sleep_s: float = 0.2, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.base_url = "https://old.cba.am"
         self.source_url = "https://old.cba.am/en/SitePages/mp2025_report.aspx"
 
-        self.session = requests.Session()
-        self.session.headers.update(
-            {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
-                "Accept-Language": "en,en-US;q=0.9",
-            }
-        )
+        self.session = session or build_session(self.HEADERS)
 
     @staticmethod
     def _clean(s: str) -> str:
@@ -12,6 +12,7 @@ from bs4 import BeautifulSoup
 
 from parsers.base import DocumentRecord
 from parsers.record_factory import make_record
+from parsers._http import build_session
 from storage.local import LocalStorage
 
 
@@ -63,33 +64,27 @@ def parse_english_date_any(text: str) -> Optional[date]:
     return None
 
 
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update(
-        {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/123.0 Safari/537.36"
-            ),
-            "Accept-Language": "en,en-US;q=0.9",
-        }
-    )
-    return s
-
-
 class CFPBParser:
 
 
     name = "cfpb"
 
+    HEADERS = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/123.0 Safari/537.36"
+        ),
+        "Accept-Language": "en,en-US;q=0.9",
+    }
+
     CFPB_BASE = "https://www.consumerfinance.gov"
     LIST_URL = "https://www.consumerfinance.gov/about-us/newsroom/?categories=press-release"
 
-    def __init__(self, sleep_s: float = SLEEP_DEFAULT, limit: int = 30):
+    def __init__(self, sleep_s: float = SLEEP_DEFAULT, limit: int = 30, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.limit = limit
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS)
 
 
     # http
@@ -14,27 +14,13 @@ from bs4.element import NavigableString, Tag
 
 from parsers.base import DocumentRecord
 from parsers.record_factory import make_record
+from parsers._http import build_session
 from storage.local import LocalStorage
 
 
 DATE_RE = re.compile(r"^\d{1,2}\s+[A-Za-z]+\s+\d{4}$")
 
 
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update(
-        {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120 Safari/537.36"
-            ),
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-    )
-    return s
-
-
 def _clean(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "").strip())
 
@@ -55,16 +41,25 @@ class ESRBParser:
 
     name = "esrb"
 
+    HEADERS = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/120 Safari/537.36"
+        ),
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+
     DROP_QUERY_KEYS = {
         "_", "ts", "timestamp", "t", "v", "ver", "version",
         "cb", "cachebust", "cachebuster", "nocache", "rnd", "random",
         "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
     }
 
-    def __init__(self, sleep_s: float = 0.2):
+    def __init__(self, sleep_s: float = 0.2, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.base_url = "https://www.esrb.europa.eu"
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS)
 
     def _canon_url(self, u: str) -> str:
 
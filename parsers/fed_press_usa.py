@@ -13,26 +13,12 @@ from bs4 import BeautifulSoup
 from storage.local import LocalStorage
 from parsers.base import DocumentRecord
 from parsers.record_factory import make_record
+from parsers._http import build_session
 
 
 SLEEP_DEFAULT = 0.2
 
 
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update(
-        {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/124.0 Safari/537.36"
-            ),
-            "Accept-Language": "en,en-US;q=0.9",
-        }
-    )
-    return s
-
-
 def _clean(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "").strip())
 
@@ -65,14 +51,23 @@ class FedPressReleasesParser:
 
     name = "fed"
 
-    def __init__(self, sleep_s: float = SLEEP_DEFAULT, max_items: int = 400):
+    HEADERS = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/124.0 Safari/537.36"
+        ),
+        "Accept-Language": "en,en-US;q=0.9",
+    }
+
+    def __init__(self, sleep_s: float = SLEEP_DEFAULT, max_items: int = 400, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.max_items = max_items
 
         self.base_url = "https://www.federalreserve.gov"
         self.source_url = "https://www.federalreserve.gov/newsevents/pressreleases/2025-press.htm"
 
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS)
 
     def _get_html(self, url: str) -> Optional[str]:
         try:
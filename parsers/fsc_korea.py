@@ -12,27 +12,13 @@ from bs4 import BeautifulSoup
 
 from parsers.base import DocumentRecord
 from parsers.record_factory import make_record
+from parsers._http import build_session
 from storage.local import LocalStorage
 
 
 SLEEP_DEFAULT = 0.2
 
 
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update(
-        {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/124.0 Safari/537.36"
-            ),
-            "Accept-Language": "en,en-US;q=0.9,ko;q=0.8",
-        }
-    )
-    return s
-
-
 def _clean(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "").strip())
 
@@ -71,14 +57,23 @@ class FSCKoreaParser:
 
     name = "fsc_korea"
 
-    def __init__(self, sleep_s: float = SLEEP_DEFAULT, max_pages: int = 200):
+    HEADERS = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/124.0 Safari/537.36"
+        ),
+        "Accept-Language": "en,en-US;q=0.9,ko;q=0.8",
+    }
+
+    def __init__(self, sleep_s: float = SLEEP_DEFAULT, max_pages: int = 200, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.max_pages = max_pages
 
         self.base_url = "https://www.fsc.go.kr"
         self.source_url = "https://www.fsc.go.kr/eng/pr010101"
 
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS)
 
     def _get_html(self, url: str, params: dict | None = None) -> Optional[str]:
         try:
@@ -12,6 +12,7 @@ from bs4 import BeautifulSoup
 from dateutil import parser as dparser
 
 from parsers.base import DocumentRecord
+from parsers._http import build_session
 from storage.local import LocalStorage
 
 
@@ -24,15 +25,6 @@ MONTH_MAP = {
 }
 
 
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-    })
-    return s
-
-
 def _clean(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "").strip())
 
@@ -77,12 +69,17 @@ def _doc_type(title: str) -> str:
 class MNBParser:
     name = "mnb"
 
-    def __init__(self, sleep_s: float = SLEEP_DEFAULT, debug: bool = False):
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+
+    def __init__(self, sleep_s: float = SLEEP_DEFAULT, debug: bool = False, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.debug = debug
         self.base_url = "https://www.mnb.hu"
         self.main_url = "https://www.mnb.hu/en/monetary-policy/the-monetary-council/press-releases"
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS)
         self.MAX_PDF = 3
 
     def _get(self, url: str) -> Optional[str]:
@@ -2,25 +2,26 @@ from __future__ import annotations
 
 import re
 import time
+import hashlib
 from datetime import datetime
 from typing import List, Optional
 from urllib.parse import urljoin
 
 import requests
 from bs4 import BeautifulSoup
+from lxml.etree import XPath
 
 from storage.local import LocalStorage
 from parsers.record_factory import make_record
 from parsers.base import DocumentRecord
+from parsers._http import build_session, get_listing_html, head, html_root, node_text, read_text_capped
 
 
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-    })
-    return s
+MAX_HTML_BYTES = 2_000_000
+MAX_PDF_BYTES = 35 * 1024 * 1024
+
+_ROWS_XP = XPath("//table//tr[count(td) >= 4]")
+_DESC_XP = XPath(".//text()[not(ancestor::a)]")
 
 
 def _clean(s: str) -> str:
@@ -46,7 +47,12 @@ class NBKZParser:
 
     name = "nbkz"
 
-    def __init__(self, sleep_s: float = 0.25):
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+
+    def __init__(self, sleep_s: float = 0.25, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.base_url = "https://www.nationalbank.kz"
 
@@ -54,40 +60,45 @@ class NBKZParser:
             "https://www.nationalbank.kz/en/news/"
             "grafik-prinyatiya-resheniy-po-bazovoy-stavke/rubrics/2237"
         )
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS)
 
 
 
     def _get_html(self, url: str, tries: int = 3) -> Optional[str]:
         for i in range(tries):
             try:
-                r = self.sess.get(url, timeout=30)
-                r.raise_for_status()
-                r.encoding = "utf-8"
-                return r.text
+                with self.sess.get(url, timeout=30, stream=True) as r:
+                    r.raise_for_status()
+                    return read_text_capped(r, MAX_HTML_BYTES)
+            except Exception as e:
+                if i == tries - 1:
+                    print(f"[{self.name}] html failed: {url} :: {e}")
+                time.sleep(1.0 + i)
+        return None
+
+    def _get_listing_html(self, url: str, storage: LocalStorage, tries: int = 3) -> Optional[str]:
+        for i in range(tries):
+            try:
+                return get_listing_html(self.sess, url, storage, self.name)
             except Exception as e:
                 if i == tries - 1:
                     print(f"[{self.name}] html failed: {url} :: {e}")
                 time.sleep(1.0 + i)
         return None
 
-    def _get_binary(self, url: str, tries: int = 3) -> Optional[bytes]:
+    def _get_binary(self, url: str, tries: int = 3) -> Optional[bytearray]:
         for i in range(tries):
             try:
                 r = self.sess.get(url, timeout=60, stream=True)
                 r.raise_for_status()
 
 
-                max_bytes = 35 * 1024 * 1024
-                buf, total = [], 0
-                for chunk in r.iter_content(chunk_size=1024 * 128):
-                    if not chunk:
-                        continue
-                    buf.append(chunk)
-                    total += len(chunk)
-                    if total > max_bytes:
+                buf = bytearray()
+                for chunk in r.iter_content(chunk_size=1024 * 1024):
+                    buf.extend(chunk)
+                    if len(buf) > MAX_PDF_BYTES:
                         raise RuntimeError("file too large (cap 35MB)")
-                return b"".join(buf)
+                return buf
             except Exception as e:
                 if i == tries - 1:
                     print(f"[{self.name}] binary failed: {url} :: {e}")
@@ -96,65 +107,59 @@ class NBKZParser:
 
 
 
-    def _parse_listing(self) -> List[dict]:
+    def _parse_listing(self, storage: LocalStorage) -> List[dict]:
 
 
-        html = self._get_html(self.listing_url)
+        html = self._get_listing_html(self.listing_url, storage)
         if not html:
             return []
 
-        soup = BeautifulSoup(html, "html.parser")
+        root = html_root(html)
+        if root is None:
+            return []
 
         items: List[dict] = []
 
 
-        for table in soup.find_all("table"):
-            for row in table.find_all("tr"):
-                tds = row.find_all("td")
-                if len(tds) < 4:
-                    continue
+        for tr in _ROWS_XP(root):
+            tds = tr.findall("td")
 
-                date_cell = _clean(tds[0].get_text(strip=True))
-                dt = _parse_ddmmyyyy(date_cell)
-                if not dt:
-                    continue
+            date_cell = _clean(node_text(tds[0]))
+            dt = _parse_ddmmyyyy(date_cell)
+            if not dt:
+                continue
 
-                link_cell = tds[3]
-                a = link_cell.find("a", href=True)
-                if not a:
-                    continue
+            link_cell = tds[3]
+            a = link_cell.find(".//a[@href]")
+            if a is None:
+                continue
 
-                href = (a.get("href") or "").strip()
-                if not href:
-                    continue
+            href = (a.get("href") or "").strip()
+            if not href:
+                continue
 
-                title = _clean(a.get_text(strip=True)) or "Untitled"
-                full_text = _clean(link_cell.get_text(" ", strip=True))
-                description = _clean(full_text.replace(title, ""))
+            title = _clean(node_text(a)) or "Untitled"
+            description = _clean(" ".join(t.strip() for t in _DESC_XP(link_cell) if t.strip()))
 
-                url = href if href.startswith("http") else urljoin(self.base_url, href)
-                is_pdf = ("/file/download" in href) or (url.lower().endswith(".pdf"))
+            url = href if href.startswith("http") else urljoin(self.base_url, href)
+            is_pdf = ("/file/download" in href) or (url.lower().endswith(".pdf"))
 
-                items.append({
-                    "date_dt": dt,
-                    "date_str": date_cell,
-                    "title": title,
-                    "description": description,
-                    "url": url,
-                    "is_pdf": is_pdf,
-                    "language": "en",
-                })
+            items.append({
+                "date_dt": dt,
+                "date_str": date_cell,
+                "title": title,
+                "description": description,
+                "url": url,
+                "is_pdf": is_pdf,
+                "language": "en",
+            })
 
 
-        seen = set()
-        out = []
+        by_url: dict = {}
         for it in items:
-            if it["url"] in seen:
-                continue
-            seen.add(it["url"])
-            out.append(it)
+            by_url.setdefault(it["url"], it)
 
-        return out
+        return list(by_url.values())
 
     def _extract_text_from_html(self, url: str) -> str:
         html = self._get_html(url)
@@ -179,67 +184,70 @@ class NBKZParser:
         start_dt = _to_naive(start_dt)
         end_dt = _to_naive(end_dt)
 
-        listing = self._parse_listing()
+        listing = self._parse_listing(storage)
         if not listing:
             return []
 
         out: List[DocumentRecord] = []
 
-        for it in listing:
-            pub = _to_naive(it["date_dt"])
-            if not (start_dt <= pub < end_dt):
-                continue
+        with storage.batch(self.name):
+            for it in listing:
+                pub = _to_naive(it["date_dt"])
+                if not (start_dt <= pub < end_dt):
+                    continue
 
-            url = it["url"]
+                url = it["url"]
             
-            if it["is_pdf"] and storage.pdf_seen(self.name, url):
-                continue
+                if it["is_pdf"] and storage.pdf_seen(self.name, url):
+                    continue
             
-            doc_id = f"{pub.date().isoformat()}_{abs(hash(url)) % (10**10)}"
-            if storage.exists(self.name, doc_id):
-                continue
+                doc_id = f"{pub.date().isoformat()}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}"
+                if storage.exists(self.name, doc_id):
+                    continue
 
-            title = it["title"]
-            doc_type = "Press Release (PDF)" if it["is_pdf"] else "Press Release"
+                title = it["title"]
+                doc_type = "Press Release (PDF)" if it["is_pdf"] else "Press Release"
 
-            pdf_urls: List[str] = []
-            pdf_paths: List[str] = []
-            text = ""
+                pdf_urls: List[str] = []
+                pdf_paths: List[str] = []
+                text = ""
 
-            if it["is_pdf"]:
-                pdf_urls = [url]
-                content = self._get_binary(url)
-                if content:
-                    pdf_paths.append(storage.put_pdf(self.name, doc_id, url, content, idx=1))
+                if it["is_pdf"]:
+                    pdf_urls = [url]
+                    length, _, _ = head(self.sess, url)
+                    if length is None or length <= MAX_PDF_BYTES:
+                        content = self._get_binary(url)
+                        if content:
+                            pdf_paths.append(storage.put_pdf(self.name, doc_id, url, content, idx=1))
 
-                text = it["description"] or title
-            else:
-                text = self._extract_text_from_html(url)
-                if not text:
                     text = it["description"] or title
-
-            text_path = storage.put_text(self.name, doc_id, text)
-
-            rec = make_record(
-                source=self.name,
-                doc_id=doc_id,
-                url=url,
-                title=title,
-                published_at=pub.isoformat(),    
-                language=it["language"] or "en",
-                doc_type=doc_type,
-                text_path=text_path,
-                pdf_urls=pdf_urls,
-                pdf_paths=pdf_paths,
-                meta={
-                    "country": "Kazakhstan",
-                    "source_name": "National Bank of Kazakhstan",
-                    "source_url": self.listing_url,
-                    "raw_date": it.get("date_str"),
-                },
-            )
-            out.append(rec)
-
-            time.sleep(self.sleep_s)
+                else:
+                    text = self._extract_text_from_html(url)
+                    if not text:
+                        text = it["description"] or title
+
+                text_path = storage.put_text(self.name, doc_id, text)
+
+                rec = make_record(
+                    source=self.name,
+                    doc_id=doc_id,
+                    url=url,
+                    title=title,
+                    published_at=pub.isoformat(),    
+                    language=it["language"] or "en",
+                    doc_type=doc_type,
+                    text_path=text_path,
+                    pdf_urls=pdf_urls,
+                    pdf_paths=pdf_paths,
+                    meta={
+                        "country": "Kazakhstan",
+                        "source_name": "National Bank of Kazakhstan",
+                        "source_url": self.listing_url,
+                        "raw_date": it.get("date_str"),
+                    },
+                )
+                out.append(rec)
+
+                time.sleep(self.sleep_s)
 
         return out
\ No newline at end of file
@@ -4,41 +4,58 @@ import re
 import time
 from datetime import datetime
 from typing import List, Optional
-from urllib.parse import urljoin, urlparse, parse_qs
+from urllib.parse import urljoin, unquote_plus
 
 import requests
 from bs4 import BeautifulSoup
+from lxml import etree
+from lxml.etree import XPath
 
 from parsers.base import DocumentRecord
 from storage.local import LocalStorage
 from parsers.record_factory import make_record
+from parsers._http import build_session, get_listing_html, html_root
 
 
 SLEEP_DEFAULT = 0.2
 
+_ROWS_XP = XPath("//table[@id='news']//tr")
 
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-    })
-    return s
+# форма строки, кнопка-заголовок внутри неё и h6 с датой - одним запросом
+_ROW_XP = XPath(
+    "(.//form)[1]"
+    " | (.//form)[1]//button[contains(concat(' ', normalize-space(@class), ' '), ' buttonlink ')]"
+    " | (.//span[contains(concat(' ', normalize-space(@class), ' '), ' indicators_topic ')])[1]//h6"
+)
 
 
 def _clean(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "").strip())
 
 
+def _query_id(action: str) -> str:
+    query = action.partition("#")[0].partition("?")[2]
+    for part in query.split("&"):
+        k, _, v = part.partition("=")
+        if unquote_plus(k) == "id" and v:
+            return unquote_plus(v)
+    return ""
+
+
 class NBSParser:
 
     name = "nbs"
 
-    def __init__(self, sleep_s: float = SLEEP_DEFAULT):
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+
+    def __init__(self, sleep_s: float = SLEEP_DEFAULT, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.base_url = "https://nbs.rs"
         self.main_url = "https://nbs.rs/en/drugi-nivo-navigacije/pres/"
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS)
 
     def _get(self, url: str) -> Optional[str]:
         try:
@@ -50,35 +67,42 @@ class NBSParser:
             print(f"[{self.name}] fetch failed: {url} :: {e}")
             return None
 
-    def _load_listing(self) -> Optional[BeautifulSoup]:
-        html = self._get(self.main_url)
+    def _get_listing(self, url: str, storage: LocalStorage) -> Optional[str]:
+        try:
+            return get_listing_html(self.sess, url, storage, self.name)
+        except Exception as e:
+            print(f"[{self.name}] fetch failed: {url} :: {e}")
+            return None
+
+    def _load_listing(self, storage: LocalStorage) -> Optional[etree._Element]:
+        html = self._get_listing(self.main_url, storage)
         if not html:
             return None
-        return BeautifulSoup(html, "html.parser")
+        return html_root(html)
 
-    def _iter_rows(self, soup: BeautifulSoup):
-        table = soup.find("table", {"id": "news"})
-        if not table:
-            return
-        for row in table.find_all("tr"):
-            yield row
+    def _iter_rows(self, root: etree._Element):
+        yield from _ROWS_XP(root)
 
     def _parse_row(self, row) -> Optional[dict]:
 
-        form = row.find("form")
-        if not form or not form.get("action"):
+        found: dict = {}
+        for el in _ROW_XP(row):
+            found.setdefault(el.tag, el)
+
+        form = found.get("form")
+        title_elem = found.get("button")
+        date_elem = found.get("h6")
+
+        if form is None or not form.get("action"):
             return None
 
-        q = urlparse(form["action"]).query
-        doc_id = parse_qs(q).get("id", [""])[0]
+        doc_id = _query_id(form.get("action"))
         if not doc_id:
             return None
 
-        title_elem = form.find("button", class_="buttonlink")
-        title = _clean(title_elem.get_text()) if title_elem else "Untitled"
+        title = _clean(title_elem.text_content()) if title_elem is not None else "Untitled"
 
-        date_elem = row.find("span", class_="indicators_topic")
-        date_str = _clean(date_elem.find("h6").get_text()) if date_elem and date_elem.find("h6") else ""
+        date_str = _clean(date_elem.text_content()) if date_elem is not None else ""
         if not date_str:
             return None
 
@@ -125,55 +149,56 @@ class NBSParser:
         return text, pdfs
 
     def fetch_range(self, start_dt: datetime, end_dt: datetime, storage: LocalStorage) -> List[DocumentRecord]:
-        soup = self._load_listing()
-        if not soup:
+        root = self._load_listing(storage)
+        if root is None:
             return []
 
         out: list[DocumentRecord] = []
 
-        for row in self._iter_rows(soup):
-            meta = self._parse_row(row)
-            if not meta:
-                continue
-
-            published_dt: datetime = meta["published_dt"]
-            if not (start_dt <= published_dt < end_dt):
-                continue
-
-            doc_id: str = meta["doc_id"]
-            if storage.exists(self.name, doc_id):
-                continue
-
-            doc_url: str = meta["doc_url"]
-            title: str = meta["title"]
-
-            text, pdfs = self._parse_detail(doc_url)
-
-            pdf_urls: list[str] = []
-            pdf_paths: list[str] = []
-            for (pdf_url, content) in pdfs:
-                pdf_urls.append(pdf_url)
-                pdf_paths.append(storage.put_pdf(self.name, doc_id, pdf_url, content))
-
-            rec = make_record(
-                source=self.name,
-                doc_id=doc_id,
-                url=doc_url,
-                title=title,
-                published_dt=published_dt,
-                language="en",
-                doc_type="Press Release",
-                text=text or "",
-                pdf_urls=pdf_urls,
-                pdf_paths=pdf_paths,
-                meta={
-                    "country": "Serbia",
-                    "source_name": "National Bank of Serbia",
-                    "source_url": self.main_url,
-                },
-            )
-
-            out.append(rec)
-            time.sleep(self.sleep_s)
+        with storage.batch(self.name):
+            for row in self._iter_rows(root):
+                meta = self._parse_row(row)
+                if not meta:
+                    continue
+
+                published_dt: datetime = meta["published_dt"]
+                if not (start_dt <= published_dt < end_dt):
+                    continue
+
+                doc_id: str = meta["doc_id"]
+                if storage.exists(self.name, doc_id):
+                    continue
+
+                doc_url: str = meta["doc_url"]
+                title: str = meta["title"]
+
+                text, pdfs = self._parse_detail(doc_url)
+
+                pdf_urls: list[str] = []
+                pdf_paths: list[str] = []
+                for (pdf_url, content) in pdfs:
+                    pdf_urls.append(pdf_url)
+                    pdf_paths.append(storage.put_pdf(self.name, doc_id, pdf_url, content))
+
+                rec = make_record(
+                    source=self.name,
+                    doc_id=doc_id,
+                    url=doc_url,
+                    title=title,
+                    published_dt=published_dt,
+                    language="en",
+                    doc_type="Press Release",
+                    text=text or "",
+                    pdf_urls=pdf_urls,
+                    pdf_paths=pdf_paths,
+                    meta={
+                        "country": "Serbia",
+                        "source_name": "National Bank of Serbia",
+                        "source_url": self.main_url,
+                    },
+                )
+
+                out.append(rec)
+                time.sleep(self.sleep_s)
 
         return out
\ No newline at end of file
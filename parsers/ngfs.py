@@ -8,30 +8,27 @@ from datetime import datetime
 from typing import List, Optional
 from urllib.parse import urljoin
 
+import soupsieve
 import requests
 from bs4 import BeautifulSoup
 
 from parsers.base import DocumentRecord
 from parsers.record_factory import make_record
+from parsers._http import build_session, first_by_priority, get_listing_html, head, read_text_capped
 from storage.local import LocalStorage
 
 
 SLEEP_DEFAULT = 0.2
+MAX_HTML_BYTES = 2_000_000
 
 
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update(
-        {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/124.0 Safari/537.36"
-            ),
-            "Accept-Language": "en,en-US;q=0.9",
-        }
-    )
-    return s
+_CONTAINER_ORDER = ("article", "main", ".content", ".article-body", ".post-content")
+_CONTAINER_SEL = soupsieve.compile(", ".join(_CONTAINER_ORDER))
+_CONTAINER_SELS = [soupsieve.compile(x) for x in _CONTAINER_ORDER]
+
+_DATE_ORDER = (".date", ".field--name-created", ".submitted", ".article-date")
+_DATE_SEL = soupsieve.compile(", ".join(_DATE_ORDER))
+_DATE_SELS = [soupsieve.compile(x) for x in _DATE_ORDER]
 
 
 def _clean(s: str) -> str:
@@ -82,20 +79,35 @@ class NGFSParser:
 
     name = "ngfs"
 
-    def __init__(self, sleep_s: float = SLEEP_DEFAULT, max_items: int = 200):
+    HEADERS = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/124.0 Safari/537.36"
+        ),
+        "Accept-Language": "en,en-US;q=0.9",
+    }
+
+    def __init__(self, sleep_s: float = SLEEP_DEFAULT, max_items: int = 200, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.max_items = max_items
 
         self.base_url = "https://www.ngfs.net"
         self.source_url = "https://www.ngfs.net/en/press-release"
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS)
 
     def _get_html(self, url: str) -> Optional[str]:
         try:
-            r = self.sess.get(url, timeout=30)
-            r.raise_for_status()
-            r.encoding = "utf-8"
-            return r.text
+            with self.sess.get(url, timeout=30, stream=True) as r:
+                r.raise_for_status()
+                return read_text_capped(r, MAX_HTML_BYTES)
+        except Exception as e:
+            print(f"[{self.name}] fetch failed: {url} :: {e}")
+            return None
+
+    def _get_listing_html(self, url: str, storage: LocalStorage) -> Optional[str]:
+        try:
+            return get_listing_html(self.sess, url, storage, self.name)
         except Exception as e:
             print(f"[{self.name}] fetch failed: {url} :: {e}")
             return None
@@ -111,14 +123,33 @@ class NGFSParser:
     def _make_doc_id(self, doc_url: str) -> str:
         return hashlib.sha1((doc_url or "").encode("utf-8")).hexdigest()[:16]
 
-    def _parse_listing(self) -> List[str]:
-        html = self._get_html(self.source_url)
+    def _listing_date(self, a) -> Optional[datetime]:
+
+        box = a.find_parent(["article", "li"])
+        if not box:
+            return None
+
+        # несколько дат в одном блоке - это уже не строка листинга, доверять нельзя
+        times = box.find_all("time", limit=2)
+        if len(times) == 1:
+            t = times[0]
+            d = _parse_ngfs_date_any(t.get_text(" ", strip=True)) or _parse_ngfs_date_any(t.get("datetime") or "")
+            if d:
+                return d
+
+        dates = box.select(".date", limit=2)
+        if len(dates) == 1:
+            return _parse_ngfs_date_any(dates[0].get_text(" ", strip=True))
+        return None
+
+    def _parse_listing(self, storage: LocalStorage) -> List[dict]:
+        html = self._get_listing_html(self.source_url, storage)
         if not html:
             return []
 
         soup = BeautifulSoup(html, "html.parser")
 
-        urls: list[str] = []
+        items: list[dict] = []
         for a in soup.find_all("a", href=True):
             href = (a.get("href") or "").strip()
             if not href:
@@ -126,30 +157,24 @@ class NGFSParser:
             if "/press-release/" not in href:
                 continue
             full = urljoin(self.base_url, href)
-            urls.append(full)
+            items.append({"url": full, "published_dt": self._listing_date(a)})
 
 
-        seen = set()
-        out: list[str] = []
-        for u in urls:
-            if u in seen:
-                continue
-            seen.add(u)
-            out.append(u)
-            if self.max_items and len(out) >= self.max_items:
-                break
-        return out
+        by_url: dict[str, dict] = {}
+        for it in items:
+            prev = by_url.get(it["url"])
+            if prev is None:
+                if self.max_items and len(by_url) >= self.max_items:
+                    continue
+                by_url[it["url"]] = it
+            elif prev["published_dt"] is None:
+                prev["published_dt"] = it["published_dt"]
+        return list(by_url.values())
 
     def _extract_main_text(self, soup: BeautifulSoup) -> str:
 
-        container = (
-            soup.select_one("article")
-            or soup.select_one("main")
-            or soup.select_one(".content")
-            or soup.select_one(".article-body")
-            or soup.select_one(".post-content")
-            or soup.body
-        )
+        found = first_by_priority(_CONTAINER_SEL.select(soup), _CONTAINER_SELS)
+        container = found[0] if found else soup.body
         if not container:
             return ""
 
@@ -167,62 +192,55 @@ class NGFSParser:
 
         return _clean(container.get_text(" ", strip=True))
 
-    def _extract_date(self, soup: BeautifulSoup) -> Optional[datetime]:
-
-        for t in soup.find_all("time"):
+    def _scan(self, soup: BeautifulSoup) -> tuple:
+
+        # один проход по дереву: первый h1, все <time> и ссылки на PDF
+        h1 = None
+        times: list = []
+        pdf_hrefs: list[str] = []
+        loose_hrefs: list[str] = []
+        for el in soup.find_all(["h1", "time", "a"]):
+            if el.name == "a":
+                href = el.get("href") or ""
+                hl = href.lower()
+                if hl.endswith(".pdf"):
+                    pdf_hrefs.append(href)
+                elif ".pdf" in hl:
+                    loose_hrefs.append(href)
+            elif el.name == "time":
+                times.append(el)
+            elif h1 is None:
+                h1 = el
+
+        return h1, times, pdf_hrefs or loose_hrefs
+
+    def _extract_date(self, soup: BeautifulSoup, times: list) -> Optional[datetime]:
+
+        for t in times:
             cand = t.get_text(" ", strip=True) or (t.get("datetime") or "")
             d = _parse_ngfs_date_any(cand)
             if d:
                 return d
 
 
-        for sel in [".date", ".field--name-created", ".submitted", ".article-date"]:
-            el = soup.select_one(sel)
-            if el:
-                d = _parse_ngfs_date_any(el.get_text(" ", strip=True))
-                if d:
-                    return d
+        for el in first_by_priority(_DATE_SEL.select(soup), _DATE_SELS):
+            d = _parse_ngfs_date_any(el.get_text(" ", strip=True))
+            if d:
+                return d
 
 
         text = soup.get_text(" ", strip=True)
         return _parse_ngfs_date_any(text)
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
-        h1 = soup.find("h1")
+    def _extract_title(self, soup: BeautifulSoup, h1) -> str:
         if h1:
             return _clean(h1.get_text(" ", strip=True))
         if soup.title and soup.title.string:
             return _clean(soup.title.string)
         return ""
 
-    def _extract_pdf_urls(self, soup: BeautifulSoup, page_url: str) -> List[str]:
-        pdfs: list[str] = []
-
-
-        for a in soup.select('a[href$=".pdf" i]'):
-            href = a.get("href")
-            if not href:
-                continue
-            pdfs.append(urljoin(page_url, href))
-
-
-        if not pdfs:
-            for a in soup.find_all("a", href=True):
-                href = a.get("href") or ""
-                if ".pdf" in href.lower():
-                    pdfs.append(urljoin(page_url, href))
-
-
-        seen = set()
-        out: list[str] = []
-        for u in pdfs:
-            if u in seen:
-                continue
-            seen.add(u)
-            out.append(u)
-            if len(out) >= 3:
-                break
-        return out
+    def _extract_pdf_urls(self, hrefs: List[str], page_url: str) -> List[str]:
+        return list(dict.fromkeys(urljoin(page_url, href) for href in hrefs))[:3]
 
     def _parse_detail(self, url: str) -> dict:
         html = self._get_html(url)
@@ -231,68 +249,84 @@ class NGFSParser:
 
         soup = BeautifulSoup(html, "html.parser")
 
-        title = self._extract_title(soup)
-        pub_dt = self._extract_date(soup)
+        h1, times, pdf_hrefs = self._scan(soup)
+
+        title = self._extract_title(soup, h1)
+        pub_dt = self._extract_date(soup, times)
         text = self._extract_main_text(soup)
-        pdf_urls = self._extract_pdf_urls(soup, url)
+        pdf_urls = self._extract_pdf_urls(pdf_hrefs, url)
 
         return {"title": title, "published_dt": pub_dt, "text": text, "pdf_urls": pdf_urls}
 
     def fetch_range(self, start_dt: datetime, end_dt: datetime, storage: LocalStorage) -> List[DocumentRecord]:
         out: list[DocumentRecord] = []
 
-        urls = self._parse_listing()
-        for doc_url in urls:
-            doc_id = self._make_doc_id(doc_url)
+        listing = self._parse_listing(storage)
+        with storage.batch(self.name):
+            for item in listing:
+                doc_url = item["url"]
 
-            if storage.exists(self.name, doc_id):
-                continue
-
-            detail = self._parse_detail(doc_url)
-            if not detail:
-                continue
+                # дата из листинга позволяет отсеять релизы вне окна без запроса страницы;
+                # если даты в листинге нет - узнаём её со страницы релиза
+                listed_dt: Optional[datetime] = item.get("published_dt")
+                if listed_dt and not (start_dt <= listed_dt < end_dt):
+                    continue
 
-            pub_dt: Optional[datetime] = detail.get("published_dt")
-            if not pub_dt:
+                doc_id = self._make_doc_id(doc_url)
 
-                continue
+                if storage.exists(self.name, doc_id):
+                    continue
 
-            if not (start_dt <= pub_dt < end_dt):
-                continue
+                detail = self._parse_detail(doc_url)
+                if not detail:
+                    continue
 
-            title = detail.get("title") or "Press release"
-            text = detail.get("text") or ""
-            pdf_urls: List[str] = detail.get("pdf_urls") or []
+                pub_dt: Optional[datetime] = detail.get("published_dt") or listed_dt
+                if not pub_dt:
 
-            text_path = storage.put_text(self.name, doc_id, text)
+                    continue
 
-            pdf_paths: list[str] = []
-            for idx, pdf_url in enumerate(pdf_urls, start=1):
-                if storage.pdf_seen(self.name, pdf_url):
+                if not (start_dt <= pub_dt < end_dt):
                     continue
-                blob = self._get_bin(pdf_url)
-                if blob and len(blob) > 5000:
-                    pdf_paths.append(storage.put_pdf(self.name, doc_id, pdf_url, blob, idx=idx))
-
-            rec = make_record(
-                source=self.name,
-                doc_id=doc_id,
-                url=doc_url,
-                title=title,
-                date=pub_dt.date().isoformat(),
-                language="en",
-                doc_type="Press Release",
-                text_path=text_path,
-                pdf_urls=pdf_urls,
-                pdf_paths=pdf_paths,
-                meta={
-                    "country": "International",
-                    "source_name": "NGFS (Network for Greening the Financial System)",
-                    "source_url": self.source_url,
-                },
-            )
-
-            out.append(rec)
-            time.sleep(self.sleep_s)
+
+                title = detail.get("title") or "Press release"
+                text = detail.get("text") or ""
+                pdf_urls: List[str] = detail.get("pdf_urls") or []
+
+                text_path = storage.put_text(self.name, doc_id, text)
+
+                pdf_paths: list[str] = []
+                for idx, pdf_url in enumerate(pdf_urls, start=1):
+                    if storage.pdf_seen(self.name, pdf_url):
+                        continue
+
+                    length, _, _ = head(self.sess, pdf_url)
+                    if length is not None and length <= 5000:
+                        continue
+
+                    blob = self._get_bin(pdf_url)
+                    if blob and len(blob) > 5000:
+                        pdf_paths.append(storage.put_pdf(self.name, doc_id, pdf_url, blob, idx=idx))
+
+                rec = make_record(
+                    source=self.name,
+                    doc_id=doc_id,
+                    url=doc_url,
+                    title=title,
+                    date=pub_dt.date().isoformat(),
+                    language="en",
+                    doc_type="Press Release",
+                    text_path=text_path,
+                    pdf_urls=pdf_urls,
+                    pdf_paths=pdf_paths,
+                    meta={
+                        "country": "International",
+                        "source_name": "NGFS (Network for Greening the Financial System)",
+                        "source_url": self.source_url,
+                    },
+                )
+
+                out.append(rec)
+                time.sleep(self.sleep_s)
 
         return out
\ No newline at end of file
@@ -7,30 +7,26 @@ from datetime import datetime
 from typing import List, Optional
 from urllib.parse import urljoin
 
+import soupsieve
 import requests
 from bs4 import BeautifulSoup
+from lxml.etree import XPath
 
 from parsers.base import DocumentRecord
 from parsers.record_factory import make_record
+from parsers._http import build_session, first_by_priority, get_listing_html, html_root, node_text, read_text_capped
 from storage.local import LocalStorage
 
 
 SLEEP_DEFAULT = 0.2
+MAX_HTML_BYTES = 5_000_000
 
 
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update(
-        {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/124.0 Safari/537.36"
-            ),
-            "Accept-Language": "en,en-US;q=0.9",
-        }
-    )
-    return s
+_CONTAINER_ORDER = ("article", "main", "div.main-content", "div.region-content", "div.layout-content")
+_CONTAINER_SEL = soupsieve.compile(", ".join(_CONTAINER_ORDER))
+_CONTAINER_SELS = [soupsieve.compile(x) for x in _CONTAINER_ORDER]
+
+_ROWS_XP = XPath("//table//tr[count(td) >= 3]")
 
 
 def _clean(s: str) -> str:
@@ -42,28 +38,12 @@ def _is_pdf(url: str) -> bool:
     return u.endswith(".pdf") or ".pdf" in u
 
 
-def _extract_text_basic(soup: BeautifulSoup) -> str:
-
-
-    container = (
-        soup.select_one("article")
-        or soup.select_one("main")
-        or soup.select_one("div.main-content")
-        or soup.select_one("div.region-content")
-        or soup.select_one("div.layout-content")
-        or soup.body
-        or soup
-    )
-
-    parts: list[str] = []
-    for tag in container.find_all(["p", "li"]):
-        t = tag.get_text(" ", strip=True)
-        if t:
-            parts.append(_clean(t))
+def _release_container(soup: BeautifulSoup):
+    found = first_by_priority(_CONTAINER_SEL.select(soup), _CONTAINER_SELS)
+    return found[0] if found else (soup.body or soup)
 
-    if parts:
-        return "\n\n".join(parts)
 
+def _extract_text_fallback(soup: BeautifulSoup) -> str:
     for el in soup.find_all(["script", "style", "noscript"]):
         el.decompose()
     return _clean(soup.get_text(" ", strip=True))
@@ -74,21 +54,36 @@ class OCCParser:
 
     name = "occ"
 
+    HEADERS = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/124.0 Safari/537.36"
+        ),
+        "Accept-Language": "en,en-US;q=0.9",
+    }
+
     BASE_URL = "https://www.occ.gov"
     SOURCE_URL = "https://www.occ.gov/news-events/newsroom/"
 
-    def __init__(self, sleep_s: float = SLEEP_DEFAULT, years_back: int = 2):
+    def __init__(self, sleep_s: float = SLEEP_DEFAULT, years_back: int = 2, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.years_back = years_back
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS)
 
 
     def _get_html(self, url: str) -> Optional[str]:
         try:
-            r = self.sess.get(url, timeout=30)
-            r.raise_for_status()
-            r.encoding = "utf-8"
-            return r.text
+            with self.sess.get(url, timeout=30, stream=True) as r:
+                r.raise_for_status()
+                return read_text_capped(r, MAX_HTML_BYTES)
+        except Exception as e:
+            print(f"[{self.name}] fetch failed: {url} :: {e}")
+            return None
+
+    def _get_listing_html(self, url: str, storage: LocalStorage) -> Optional[str]:
+        try:
+            return get_listing_html(self.sess, url, storage, self.name)
         except Exception as e:
             print(f"[{self.name}] fetch failed: {url} :: {e}")
             return None
@@ -116,38 +111,33 @@ class OCCParser:
         except Exception:
             return None
 
-    def _parse_index_year(self, year: int) -> List[dict]:
+    def _parse_index_year(self, year: int, storage: LocalStorage) -> List[dict]:
 
 
         url = self._year_index_url(year)
-        html = self._get_html(url)
+        html = self._get_listing_html(url, storage)
         if not html:
             return []
 
-        soup = BeautifulSoup(html, "html.parser")
-
-
-        rows = soup.select("table tbody tr")
-        if not rows:
-            rows = soup.select("table tr")
+        root = html_root(html)
+        if root is None:
+            return []
 
         out: List[dict] = []
-        for tr in rows:
-            tds = tr.find_all("td")
-            if len(tds) < 3:
-                continue
+        for tr in _ROWS_XP(root):
+            tds = tr.findall("td")
 
-            raw_date = _clean(tds[0].get_text(" ", strip=True))
+            raw_date = _clean(node_text(tds[0], " "))
             dt = self._parse_mmddyyyy(raw_date)
             if not dt:
                 continue
 
-            a = tds[2].find("a", href=True)
-            if not a:
+            a = tds[2].find(".//a[@href]")
+            if a is None:
                 continue
 
-            title = _clean(a.get_text(" ", strip=True))
-            doc_url = urljoin(url, a["href"])
+            title = _clean(node_text(a, " "))
+            doc_url = urljoin(url, a.get("href"))
 
             out.append(
                 {
@@ -175,31 +165,30 @@ class OCCParser:
 
         soup = BeautifulSoup(html, "html.parser")
 
-        h1 = soup.find("h1")
-        title = _clean(h1.get_text(" ", strip=True)) if h1 else ""
-
-        text = _extract_text_basic(soup)
-
+        container = _release_container(soup)
 
+        # заголовок и PDF-ссылки - за один проход по документу, абзацы - только по контейнеру
+        h1 = None
         pdfs: List[str] = []
-        for a in soup.find_all("a", href=True):
-            href = (a.get("href") or "").strip()
-            if not href:
-                continue
-            if href.lower().endswith(".pdf") or ".pdf" in href.lower():
-                pdfs.append(urljoin(doc_url, href))
+        for el in soup.find_all(["h1", "a"]):
+            if el.name == "a":
+                href = (el.get("href") or "").strip()
+                if href and ".pdf" in href.lower():
+                    pdfs.append(urljoin(doc_url, href))
+            elif h1 is None:
+                h1 = el
+
+        parts: List[str] = []
+        for el in container.find_all(["p", "li"]):
+            t = el.get_text(" ", strip=True)
+            if t:
+                parts.append(_clean(t))
 
+        title = _clean(h1.get_text(" ", strip=True)) if h1 else ""
+        text = "\n\n".join(parts) if parts else _extract_text_fallback(soup)
 
-        seen = set()
-        uniq: List[str] = []
-        for u in pdfs:
-            if u and u not in seen:
-                seen.add(u)
-                uniq.append(u)
-            if len(uniq) >= 3:
-                break
 
-        return {"title": title, "text": text, "pdf_urls": uniq}
+        return {"title": title, "text": text, "pdf_urls": list(dict.fromkeys(pdfs))[:3]}
 
 
 
@@ -217,62 +206,66 @@ class OCCParser:
                 extra.append(y)
         years = sorted(set(years + extra), reverse=True)
 
-        for y in years:
-            metas = self._parse_index_year(y)
-            if not metas:
-                continue
-
-            for m in metas:
-                pub_dt: datetime = m["published_dt"]
-                if not (start_dt <= pub_dt < end_dt):
+        with storage.batch(self.name):
+            for y in years:
+                metas = self._parse_index_year(y, storage)
+                if not metas:
                     continue
 
-                doc_url = m["doc_url"]
-                doc_id = self._make_doc_id(doc_url)
-
-                if storage.exists(self.name, doc_id):
-                    continue
-
-                detail = self._parse_release(doc_url)
-                if not detail:
-                    continue
-
-                title = detail.get("title") or m.get("title") or "Untitled"
-                text = detail.get("text") or ""
-                pdf_urls: List[str] = detail.get("pdf_urls") or []
+                for m in metas:
+                    # дата берётся из строки годового индекса, так что страница релиза
+                    # (_parse_release) запрашивается только для записей внутри окна
+                    pub_dt: datetime = m["published_dt"]
+                    if not (start_dt <= pub_dt < end_dt):
+                        continue
 
-                text_path = storage.put_text(self.name, doc_id, text)
+                    doc_url = m["doc_url"]
+                    doc_id = self._make_doc_id(doc_url)
 
-                pdf_paths: List[str] = []
-                for idx, pdf_url in enumerate(pdf_urls, start=1):
-                    if not _is_pdf(pdf_url):
+                    if storage.exists(self.name, doc_id):
                         continue
-                    if storage.pdf_seen(self.name, pdf_url):
+
+                    detail = self._parse_release(doc_url)
+                    if not detail:
                         continue
-                    blob = self._get_bin(pdf_url)
-                    if blob:
-                        pdf_paths.append(storage.put_pdf(self.name, doc_id, pdf_url, blob, idx=idx))
-
-                rec = make_record(
-                    source=self.name,
-                    doc_id=doc_id,
-                    url=doc_url,
-                    title=title,
-                    date=pub_dt.date().isoformat(),  
-                    language="en",
-                    doc_type="News Release",
-                    text_path=text_path,
-                    pdf_urls=pdf_urls,
-                    pdf_paths=pdf_paths,
-                    meta={
-                        "country": "USA",
-                        "source_name": "OCC",
-                        "source_url": self.SOURCE_URL,
-                        "index_year": m.get("index_year"),
-                    },
-                )
-
-                out.append(rec)
-                time.sleep(self.sleep_s)
+
+                    title = detail.get("title") or m.get("title") or "Untitled"
+                    text = detail.get("text") or ""
+                    pdf_urls: List[str] = detail.get("pdf_urls") or []
+
+                    text_path = storage.put_text(self.name, doc_id, text)
+
+                    pdf_paths: List[str] = []
+                    for idx, pdf_url in enumerate(pdf_urls, start=1):
+                        if not _is_pdf(pdf_url):
+                            continue
+                        if storage.pdf_seen(self.name, pdf_url):
+                            continue
+
+                        blob = self._get_bin(pdf_url)
+                        if blob:
+                            pdf_paths.append(storage.put_pdf(self.name, doc_id, pdf_url, blob, idx=idx))
+
+                    rec = make_record(
+                        source=self.name,
+                        doc_id=doc_id,
+                        url=doc_url,
+                        title=title,
+                        date=pub_dt.date().isoformat(),  
+                        language="en",
+                        doc_type="News Release",
+                        text_path=text_path,
+                        pdf_urls=pdf_urls,
+                        pdf_paths=pdf_paths,
+                        meta={
+                            "country": "USA",
+                            "source_name": "OCC",
+                            "source_url": self.SOURCE_URL,
+                            "index_year": m.get("index_year"),
+                        },
+                    )
+
+                    out.append(rec)
+                    time.sleep(self.sleep_s)
 
         return out
\ No newline at end of file
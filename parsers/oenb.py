@@ -1,44 +1,72 @@
 from __future__ import annotations
 
 import re
-import time
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import Any, Dict, List, Optional
 from urllib.parse import urljoin
 
 import requests
 from bs4 import BeautifulSoup
+from lxml.etree import XPath
 
 from parsers.base import DocumentRecord
+from parsers._http import RateLimiter, build_adapter, build_session, capped_join, html_root, node_text
 from storage.local import LocalStorage
 
 
-def _iso_from_ddmmyyyy(date_str: str) -> Optional[str]:
+MAX_TEXT_CHARS = 50000
+
+_DDMMYYYY_RE = re.compile(r"(\d{2})\.(\d{2})\.(\d{4})")
+_DATE_TEXT_RE = re.compile(r"\d{2}\.\d{2}\.\d{4}")
+_PDF_RE = re.compile(r"\.pdf", re.IGNORECASE)
+
+_EXSLT_NS = {"re": "http://exslt.org/regular-expressions"}
+_ARCHIVE_LI_XP = XPath(
+    "(//ul[contains(concat(' ', normalize-space(@class), ' '), ' press-archive ')])[1]//li"
+)
+_FIRST_A_XP = XPath("(.//a[@href])[1]")
+_DATE_SPAN_XP = XPath("(.//span[contains(@class, 'date') or contains(@class, 'time')])[1]")
+# текстовые узлы с датой в порядке документа; регексп проверяет libxml2 (EXSLT)
+_DATE_TEXT_XP = XPath(r"//text()[re:test(., '\d{2}\.\d{2}\.\d{4}')]", namespaces=_EXSLT_NS)
 
 
+def _parse_dt(date_str: str) -> Optional[datetime]:
     if not date_str:
         return None
-    m = re.search(r"(\d{2})\.(\d{2})\.(\d{4})", date_str)
+    m = _DDMMYYYY_RE.search(date_str)
     if not m:
         return None
-    dd, mm, yyyy = m.group(1), m.group(2), m.group(3)
     try:
-        dt = datetime(int(yyyy), int(mm), int(dd))
-        return dt.strftime("%Y-%m-%d")
+        return datetime(int(m.group(3)), int(m.group(2)), int(m.group(1)))
     except ValueError:
         return None
 
 
-def _parse_dt(date_str: str) -> Optional[datetime]:
-    iso = _iso_from_ddmmyyyy(date_str)
-    if not iso:
+def _iso_from_ddmmyyyy(date_str: str) -> Optional[str]:
+
+    # группы уже с ведущими нулями - ISO собирается из них напрямую,
+    # datetime нужен только как проверка, что такой день существует
+    if not date_str:
         return None
-    return datetime.strptime(iso, "%Y-%m-%d")
+    m = _DDMMYYYY_RE.search(date_str)
+    if not m:
+        return None
+    dd, mm, yyyy = m.group(1), m.group(2), m.group(3)
+    try:
+        datetime(int(yyyy), int(mm), int(dd))
+    except ValueError:
+        return None
+    return f"{yyyy}-{mm}-{dd}"
 
 
-def _make_doc_id(source: str, url: str) -> str:
-    return hashlib.sha1(f"{source}|{url}".encode("utf-8")).hexdigest()
+def _make_doc_id(base: Any, url: str) -> str:
+
+    # base - sha1 с уже поданным префиксом "<source>|"; copy() дешевле, чем хешировать его заново
+    h = base.copy()
+    h.update(url.encode("utf-8"))
+    return h.hexdigest()
 
 
 class OeNBParser:
@@ -46,15 +74,22 @@ class OeNBParser:
 
     name = "oenb"
 
-    def __init__(self, sleep_s: float = 0.3):
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari",
+    }
+
+    # своего цикла повторов нет - ретраит адаптер сессии
+    HTTP_RETRIES = True
+
+    def __init__(self, sleep_s: float = 0.3, workers: int = 8, session: Optional[requests.Session] = None):
         self.base_url = "https://www.oenb.at"
         self.press_url = "https://www.oenb.at/Presse.html"
         self.sleep_s = sleep_s
+        self.workers = workers
+        self._limiter = RateLimiter(sleep_s)
+        self._doc_id_base = hashlib.sha1(f"{self.name}|".encode("utf-8"))
 
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari"
-        })
+        self.session = session or build_session(self.HEADERS, build_adapter(self.HTTP_RETRIES))
 
     def _get_page(self, url: str) -> Optional[str]:
         try:
@@ -66,94 +101,102 @@ class OeNBParser:
             print(f"[{self.name}] ERROR GET {url}: {e}")
             return None
 
+    def _fetch_page(self, url: str) -> Optional[str]:
+        self._limiter.wait()
+        return self._get_page(url)
+
     def _extract_press_links(self, html: str) -> List[Dict[str, Any]]:
-        soup = BeautifulSoup(html, "html.parser")
-        links: List[Dict[str, Any]] = []
+        root = html_root(html)
+        if root is None:
+            return []
 
-        
-        press_archive = soup.find("ul", class_="press-archive")
-        if press_archive:
-            for li in press_archive.find_all("li"):
-                a = li.find("a", href=True)
-                if not a:
-                    continue
+        # url -> запись; первая найденная ссылка выигрывает
+        links: Dict[str, Dict[str, Any]] = {}
 
-                title = a.get_text(strip=True)
-                full_url = urljoin(self.base_url, a["href"])
+        for li in _ARCHIVE_LI_XP(root):
+            found = _FIRST_A_XP(li)
+            if not found:
+                continue
+            a = found[0]
 
-                date_span = li.find("span", class_=re.compile("date|time"))
-                date_text = date_span.get_text(strip=True) if date_span else None
+            full_url = urljoin(self.base_url, a.get("href"))
+            if full_url in links:
+                continue
 
-                links.append({"title": title, "url": full_url, "date": date_text})
+            date_span = _DATE_SPAN_XP(li)
+            date_text = node_text(date_span[0]) if date_span else None
 
-       
-        date_pattern = r"\d{2}\.\d{2}\.\d{4}"
-        for node in soup.find_all(string=re.compile(date_pattern)):
-            parent = node.find_parent()
-            if not parent:
-                continue
-            a = parent.find("a", href=True)
-            if not a:
+            links[full_url] = {"title": node_text(a), "url": full_url, "date": date_text}
+
+        # текст с датой -> первая ссылка где угодно внутри его родителя
+        first_a: Dict[Any, Any] = {}
+        for node in _DATE_TEXT_XP(root):
+            # хвостовой текст (после </b> и т.п.) lxml цепляет к предыдущему элементу
+            parent = node.getparent()
+            if node.is_tail:
+                parent = parent.getparent()
+            if parent is None:
                 continue
 
-            title = a.get_text(strip=True)
-            full_url = urljoin(self.base_url, a["href"])
-            m = re.search(date_pattern, str(node))
-            links.append({"title": title, "url": full_url, "date": m.group(0) if m else None})
+            if parent not in first_a:
+                found = _FIRST_A_XP(parent)
+                first_a[parent] = found[0] if found else None
+            a = first_a[parent]
+            if a is None:
+                continue
 
-      
-        uniq: List[Dict[str, Any]] = []
-        seen = set()
-        for x in links:
-            if x["url"] in seen:
+            full_url = urljoin(self.base_url, a.get("href"))
+            if full_url in links:
                 continue
-            uniq.append(x)
-            seen.add(x["url"])
-        return uniq
+
+            m = _DATE_TEXT_RE.search(node)
+            links[full_url] = {"title": node_text(a), "url": full_url, "date": m.group(0) if m else None}
+
+        return list(links.values())
 
     def _extract_press_release_data(self, html: str, url: str) -> Dict[str, Any]:
-        soup = BeautifulSoup(html, "html.parser")
+        soup = BeautifulSoup(html, "lxml")
 
         title_tag = soup.find("h1") or soup.find("title")
         title = title_tag.get_text(strip=True) if title_tag else "Unknown"
 
         
-        date_match = re.search(r"(\d{2}\.\d{2}\.\d{4})", url)
-        date_str = date_match.group(1) if date_match else None
+        date_match = _DATE_TEXT_RE.search(url)
+        date_str = date_match.group(0) if date_match else None
         if not date_str:
-            any_date = soup.find(string=re.compile(r"\d{2}\.\d{2}\.\d{4}"))
+            any_date = soup.find(string=_DATE_TEXT_RE)
             if any_date:
-                m = re.search(r"(\d{2}\.\d{2}\.\d{4})", str(any_date))
-                date_str = m.group(1) if m else None
+                m = _DATE_TEXT_RE.search(str(any_date))
+                date_str = m.group(0) if m else None
 
         # основной текст
         selectors = ["article", "main", ".content", ".article-content", ".press-release", ".main-content"]
         text_content = ""
+        # первый найденный контейнер и есть текст релиза - get_text один раз
         for sel in selectors:
             block = soup.select_one(sel)
             if not block:
                 continue
             for bad in block(["script", "style", "nav", "header", "footer"]):
                 bad.decompose()
-            text_content = block.get_text(separator="\n", strip=True)
-            if len(text_content) > 200:
-                break
+            text_content = capped_join(block.stripped_strings, "\n", MAX_TEXT_CHARS)
+            break
 
         if not text_content:
             body = soup.find("body")
             if body:
                 for bad in body(["script", "style", "nav", "header", "footer"]):
                     bad.decompose()
-                text_content = body.get_text(separator="\n", strip=True)
+                text_content = capped_join(body.stripped_strings, "\n", MAX_TEXT_CHARS)
 
        
         pdf_urls = []
         for a in soup.find_all("a", href=True):
             href = a["href"]
-            if ".pdf" in href.lower():
+            if _PDF_RE.search(href):
                 pdf_urls.append(urljoin(self.base_url, href))
 
-        return {"title": title, "date": date_str, "text": text_content[:50000], "pdf_urls": pdf_urls}
+        return {"title": title, "date": date_str, "text": text_content, "pdf_urls": pdf_urls}
 
     def fetch_range(self, start_dt: datetime, end_dt: datetime, storage: LocalStorage) -> List[DocumentRecord]:
 
@@ -165,6 +208,7 @@ class OeNBParser:
         links = self._extract_press_links(main_html)
         new_records: List[DocumentRecord] = []
 
+        todo = []
         for item in links:
             dt = _parse_dt(item.get("date") or "")
             if not dt:
@@ -173,48 +217,54 @@ class OeNBParser:
                 continue
 
             url = item["url"]
-            doc_id = _make_doc_id(self.name, url)
+            doc_id = _make_doc_id(self._doc_id_base, url)
 
             if storage.exists(self.name, doc_id):
                 continue
 
-            press_html = self._get_page(url)
-            if not press_html:
-                continue
+            todo.append((item, url, doc_id))
+
+        # страницы релизов качаются параллельно (RateLimiter держит прежний темп),
+        # разбор и запись в storage - в этом потоке, по порядку
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            pages = ex.map(self._fetch_page, [url for _, url, _ in todo])
+            for (item, url, doc_id), press_html in zip(todo, pages):
+                if not press_html:
+                    continue
 
-            data = self._extract_press_release_data(press_html, url)
-            iso_date = _iso_from_ddmmyyyy(data.get("date") or item.get("date") or "")
-
-            saved_pdf_paths = []
-            for pdf_url in data.get("pdf_urls", []):
-                try:
-                    r = self.session.get(pdf_url, timeout=20)
-                    r.raise_for_status()
-                    path = storage.put_pdf(self.name, doc_id, pdf_url, r.content)
-                    saved_pdf_paths.append(path)
-                except Exception as e:
-                    print(f"[{self.name}] PDF download failed {pdf_url}: {e}")
-
-            rec = DocumentRecord(
-                doc_id=doc_id,
-                source=self.name,
-                url=url,
-                title=data.get("title") or item.get("title") or "Unknown",
-                date=iso_date,
-                language="German",
-                doc_type="Press Release",
-                text=data.get("text") or "",
-                pdf_urls=data.get("pdf_urls", []),
-                meta={
-                    "country": "Austria",
-                    "source_name": "Oesterreichische Nationalbank (OeNB)",
-                    "source_url": self.press_url,
-                    "saved_pdf_paths": saved_pdf_paths,
-                },
-            )
-            new_records.append(rec)
-
-            if self.sleep_s:
-                time.sleep(self.sleep_s)
+                data = self._extract_press_release_data(press_html, url)
+                iso_date = _iso_from_ddmmyyyy(data.get("date") or item.get("date") or "")
+
+                saved_pdf_paths = []
+                for pdf_url in data.get("pdf_urls", []):
+                    try:
+                        self._limiter.wait()
+                        with self.session.get(pdf_url, timeout=20, stream=True) as r:
+                            r.raise_for_status()
+                            path = storage.put_pdf_stream(
+                                self.name, doc_id, pdf_url, r.iter_content(chunk_size=64 * 1024)
+                            )
+                        saved_pdf_paths.append(path)
+                    except Exception as e:
+                        print(f"[{self.name}] PDF download failed {pdf_url}: {e}")
+
+                rec = DocumentRecord(
+                    doc_id=doc_id,
+                    source=self.name,
+                    url=url,
+                    title=data.get("title") or item.get("title") or "Unknown",
+                    date=iso_date,
+                    language="German",
+                    doc_type="Press Release",
+                    text=data.get("text") or "",
+                    pdf_urls=data.get("pdf_urls", []),
+                    meta={
+                        "country": "Austria",
+                        "source_name": "Oesterreichische Nationalbank (OeNB)",
+                        "source_url": self.press_url,
+                        "saved_pdf_paths": saved_pdf_paths,
+                    },
+                )
+                new_records.append(rec)
 
         return new_records
\ No newline at end of file
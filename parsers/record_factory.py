@@ -2,18 +2,33 @@ from __future__ import annotations
 
 import inspect
 from datetime import datetime, date
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from parsers.base import DocumentRecord
 
 
-def _set_first(kwargs: Dict[str, Any], params: Dict[str, Any], names: List[str], value: Any) -> None:
+# поля DocumentRecord не меняются во время работы - сигнатуру разбираем один раз
+_DR_PARAM_KEYS = frozenset(inspect.signature(DocumentRecord).parameters)
 
+# список синонимов -> первое из них, которое есть в DocumentRecord (или None)
+_RESOLVED: Dict[Tuple[str, ...], Optional[str]] = {}
 
-    for n in names:
-        if n in params:
-            kwargs[n] = value
-            return
+
+def _resolve(names: Tuple[str, ...]) -> Optional[str]:
+    try:
+        return _RESOLVED[names]
+    except KeyError:
+        key = next((n for n in names if n in _DR_PARAM_KEYS), None)
+        _RESOLVED[names] = key
+        return key
+
+
+def _set_first(kwargs: Dict[str, Any], names: Tuple[str, ...], value: Any) -> None:
+
+
+    key = _resolve(names)
+    if key is not None:
+        kwargs[key] = value
 
 
 def _to_iso_date(x: Any) -> Optional[str]:
@@ -68,15 +83,14 @@ def make_record(
 ) -> DocumentRecord:
 
 
-    sig = inspect.signature(DocumentRecord)
-    params = sig.parameters
+    params = _DR_PARAM_KEYS
     kwargs: Dict[str, Any] = {}
 
     # базовые
-    _set_first(kwargs, params, ["source"], source)
-    _set_first(kwargs, params, ["doc_id", "id"], doc_id)
-    _set_first(kwargs, params, ["url", "doc_url", "link"], url)
-    _set_first(kwargs, params, ["title"], title)
+    _set_first(kwargs, ("source",), source)
+    _set_first(kwargs, ("doc_id", "id"), doc_id)
+    _set_first(kwargs, ("url", "doc_url", "link"), url)
+    _set_first(kwargs, ("title",), title)
 
     # дата
     dt_raw = published_dt or published_at or pub_dt or date
@@ -84,38 +98,37 @@ def make_record(
 
     _set_first(
         kwargs,
-        params,
-        ["published_at", "published_dt", "pub_date", "publish_date", "date", "dt", "published", "created_at"],
+        ("published_at", "published_dt", "pub_date", "publish_date", "date", "dt", "published", "created_at"),
         dt_iso,
     )
 
     
-    _set_first(kwargs, params, ["language", "lang"], language)
-    _set_first(kwargs, params, ["doc_type", "type"], doc_type)
+    _set_first(kwargs, ("language", "lang"), language)
+    _set_first(kwargs, ("doc_type", "type"), doc_type)
 
    
     pdf_urls = pdf_urls or []
-    _set_first(kwargs, params, ["pdf_urls", "pdf_links", "pdf_url_list"], pdf_urls)
+    _set_first(kwargs, ("pdf_urls", "pdf_links", "pdf_url_list"), pdf_urls)
 
     
     pdf_paths = pdf_paths or []
     if "pdf_paths" in params:
-        _set_first(kwargs, params, ["pdf_paths"], pdf_paths)
+        _set_first(kwargs, ("pdf_paths",), pdf_paths)
     else:
         
-        _set_first(kwargs, params, ["file_path", "file_paths"], ";".join(pdf_paths) if pdf_paths else None)
+        _set_first(kwargs, ("file_path", "file_paths"), ";".join(pdf_paths) if pdf_paths else None)
 
     
     
     if text_path:
-        _set_first(kwargs, params, ["text_path"], text_path)
+        _set_first(kwargs, ("text_path",), text_path)
         
         if "text_path" not in params:
-            _set_first(kwargs, params, ["text"], text_path)
+            _set_first(kwargs, ("text",), text_path)
     else:
-        _set_first(kwargs, params, ["text"], text or "")
+        _set_first(kwargs, ("text",), text or "")
 
 
-    _set_first(kwargs, params, ["meta", "extra"], meta or {})
+    _set_first(kwargs, ("meta", "extra"), meta or {})
 
     return DocumentRecord(**kwargs)
\ No newline at end of file
@@ -1,49 +1,54 @@
 from __future__ import annotations
 
 import re
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Optional
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
-from dateutil import parser as dparser
+from bs4 import BeautifulSoup, NavigableString
 
 from parsers.base import DocumentRecord
+from parsers._dates import parse_date
+from parsers._http import RateLimiter, build_adapter, build_session, collapse_ws, get_listing_html
 from parsers.record_factory import make_record
 from storage.local import LocalStorage
 
 
 SLEEP_DEFAULT = 0.2
 
+_DOCID_SANITIZE_RE = re.compile(r"[^a-zA-Z0-9]+")
+# без учёта регистра прямо в regex - href не копируется целиком через lower()
+_PDF_RE = re.compile(r"\.pdf", re.IGNORECASE)
 
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9",
-    })
-    return s
+_DDMMYYYY_RE = re.compile(r"(\d{2})\.(\d{2})\.(\d{4})")
 
 
-def _clean(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip())
+def _is_pdf(href: str) -> bool:
+    return bool(href) and _PDF_RE.search(href) is not None
 
 
-def _is_pdf(href: str) -> bool:
-    h = (href or "").lower()
-    return h.endswith(".pdf") or ".pdf" in h
+def _el_text(el) -> str:
+    # абзац из одной строки - берём её без обхода поддерева get_text
+    s = el.string
+    if type(s) is NavigableString:
+        return s.strip()
+    return el.get_text(strip=True)
 
 
 def _parse_date_any(s: str) -> Optional[datetime]:
-    s = _clean(s)
+    s = collapse_ws(s)
     if not s:
         return None
-    try:
-        return dparser.parse(s, fuzzy=True)
-    except Exception:
-        return None
+    # DD.MM.YYYY - день первым; dateutil прочитал бы 12.03.2024 как 3 декабря
+    m = _DDMMYYYY_RE.fullmatch(s)
+    if m:
+        try:
+            return datetime(int(m.group(3)), int(m.group(2)), int(m.group(1)))
+        except ValueError:
+            pass
+    return parse_date(s)
 
 
 class TCMBParser:
@@ -51,9 +56,19 @@ class TCMBParser:
 
     name = "tcmb"
 
-    def __init__(self, sleep_s: float = SLEEP_DEFAULT, years_back: int = 2):
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36",
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+
+    # своего цикла повторов нет - ретраит адаптер сессии
+    HTTP_RETRIES = True
+
+    def __init__(self, sleep_s: float = SLEEP_DEFAULT, years_back: int = 2, workers: int = 8, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.years_back = years_back
+        self.workers = workers
+        self._limiter = RateLimiter(sleep_s)
 
         self.base_url = "https://www.tcmb.gov.tr"
         self.base_path = (
@@ -61,9 +76,11 @@ class TCMBParser:
             "Monetary+Policy/Monetary+Policy+Committee/"
         )
 
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS, build_adapter(self.HTTP_RETRIES))
 
     def _get(self, url: str) -> Optional[str]:
+        # вызывается из потоков пула - темп запросов общий на все потоки
+        self._limiter.wait()
         try:
             r = self.sess.get(url, timeout=30)
             r.raise_for_status()
@@ -73,6 +90,15 @@ class TCMBParser:
             print(f"[{self.name}] fetch failed: {url} :: {e}")
             return None
 
+    def _get_listing(self, url: str, storage: LocalStorage) -> Optional[str]:
+        # индексные страницы: условный GET (ETag / Last-Modified), тело из кэша на 304
+        self._limiter.wait()
+        try:
+            return get_listing_html(self.sess, url, storage, self.name, timeout=30)
+        except Exception as e:
+            print(f"[{self.name}] fetch failed: {url} :: {e}")
+            return None
+
     def _year_pages(self) -> List[str]:
         now_y = datetime.now().year
         years = [now_y - i for i in range(self.years_back + 1)]
@@ -81,7 +107,7 @@ class TCMBParser:
     def _extract_links_from_year_page(self, html: str, year_url: str) -> List[dict]:
 
 
-        soup = BeautifulSoup(html, "html.parser")
+        soup = BeautifulSoup(html, "lxml")
         results: List[dict] = []
 
         table = soup.find("table", id="midTable")
@@ -101,7 +127,7 @@ class TCMBParser:
             a0 = cells[0].find("a")
             if a0 and a0.get("href"):
                 doc_url = urljoin(self.base_url, a0["href"])
-                date_str = _clean(a0.get_text(strip=True)).replace("*", "")
+                date_str = collapse_ws(a0.get_text(strip=True)).replace("*", "")
                 results.append({
                     "doc_url": doc_url,
                     "date_hint": date_str,
@@ -114,7 +140,7 @@ class TCMBParser:
             a1 = cells[1].find("a")
             if a1 and a1.get("href"):
                 doc_url = urljoin(self.base_url, a1["href"])
-                date_str = _clean(a1.get_text(strip=True))
+                date_str = collapse_ws(a1.get_text(strip=True))
                 results.append({
                     "doc_url": doc_url,
                     "date_hint": date_str,
@@ -132,48 +158,45 @@ class TCMBParser:
         if not html:
             return {"title": "", "published_dt": None, "text": "", "pdf_urls": []}
 
-        soup = BeautifulSoup(html, "html.parser")
+        soup = BeautifulSoup(html, "lxml")
         content_div = soup.find("div", class_="tcmb-content")
         if not content_div:
             for el in soup.find_all(["script", "style", "noscript"]):
                 el.decompose()
             return {
-                "title": _clean(soup.title.string if soup.title else ""),
+                "title": collapse_ws(soup.title.string if soup.title else ""),
                 "published_dt": None,
-                "text": _clean(soup.get_text(" ", strip=True)),
+                "text": collapse_ws(soup.get_text(" ", strip=True)),
                 "pdf_urls": [],
             }
 
+        ltr = content_div.find_all(["p", "h3"], attrs={"dir": "ltr"})
+
         # date
         pub_dt: Optional[datetime] = None
-        for p in content_div.find_all("p", attrs={"dir": "ltr"}):
+        for p in ltr:
+            if p.name != "p":
+                continue
             style = (p.get("style") or "").lower()
             if "text-align" in style and "right" in style:
-                pub_dt = _parse_date_any(p.get_text(strip=True))
+                pub_dt = _parse_date_any(_el_text(p))
                 if pub_dt:
                     break
 
         # title
         h2 = content_div.find("h2", attrs={"dir": "ltr"})
-        title = _clean(h2.get_text(strip=True)) if h2 else ""
+        title = collapse_ws(_el_text(h2)) if h2 else ""
 
         # text
-        text_parts: List[str] = []
-        for el in content_div.find_all(["p", "h3"], attrs={"dir": "ltr"}):
-            cls = " ".join(el.get("class") or [])
-            if "pdf" in cls.lower():
-                continue
-
-            t = _clean(el.get_text(strip=True))
-            if not t:
-                continue
-
-            if t.startswith("No:") or t.startswith("Meeting Date:"):
-                continue
-
-            text_parts.append(t)
-
-        text = "\n\n".join(text_parts).strip()
+        parts = (
+            collapse_ws(_el_text(el))
+            for el in ltr
+            if "pdf" not in " ".join(el.get("class") or []).lower()
+        )
+        text = "\n\n".join(
+            t for t in parts
+            if t and not t.startswith(("No:", "Meeting Date:"))
+        ).strip()
 
         # pdf links
         pdf_urls: List[str] = []
@@ -212,89 +235,89 @@ class TCMBParser:
 
     def fetch_range(self, start_dt: datetime, end_dt: datetime, storage: LocalStorage) -> List[DocumentRecord]:
         
-        candidates: List[dict] = []
-        for year_url in self._year_pages():
-            html = self._get(year_url)
-            if not html:
-                continue
-            candidates.extend(self._extract_links_from_year_page(html, year_url))
-            time.sleep(self.sleep_s)
+        year_urls = self._year_pages()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(year_urls)))) as ex:
+            htmls = list(ex.map(lambda u: self._get_listing(u, storage), year_urls))
 
-        
+        # дубли (одна ссылка на нескольких годовых страницах) отсекаем сразу при сборе
         seen_c = set()
-        uniq_candidates: List[dict] = []
-        for c in candidates:
-            key = (c.get("doc_url", ""), c.get("doc_type", ""))
-            if not key[0]:
-                continue
-            if key in seen_c:
+        candidates: List[dict] = []
+        for year_url, html in zip(year_urls, htmls):
+            if not html:
                 continue
-            seen_c.add(key)
-            uniq_candidates.append(c)
-        candidates = uniq_candidates
+            for c in self._extract_links_from_year_page(html, year_url):
+                key = (c.get("doc_url", ""), c.get("doc_type", ""))
+                if not key[0] or key in seen_c:
+                    continue
+                seen_c.add(key)
+                candidates.append(c)
 
-       
         out: List[DocumentRecord] = []
 
-        for c in candidates:
-            doc_url = c["doc_url"]
-            doc_id = re.sub(r"[^a-zA-Z0-9]+", "_", doc_url).strip("_")[-120:]
-            if storage.exists(self.name, doc_id):
-                continue
-
-            detail = self._parse_detail(doc_url)
-
-           
-            pub_dt = detail.get("published_dt")
-            if not pub_dt:
-                pub_dt = _parse_date_any(c.get("date_hint", ""))
-
-            if not pub_dt:
-                continue
+        keyed = [
+            (c, c["doc_url"], _DOCID_SANITIZE_RE.sub("_", c["doc_url"]).strip("_")[-120:])
+            for c in candidates
+        ]
+        existing = storage.exists_batch(self.name, (doc_id for _, _, doc_id in keyed))
+        todo = [x for x in keyed if x[2] not in existing]
+
+        # детальные страницы качаются и разбираются в пуле; результаты забираем
+        # в порядке кандидатов, чтобы порядок записей не зависел от сети
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            details = ex.map(self._parse_detail, [doc_url for _, doc_url, _ in todo])
+            for (c, doc_url, doc_id), detail in zip(todo, details):
+                pub_dt = detail.get("published_dt")
+                if not pub_dt:
+                    pub_dt = _parse_date_any(c.get("date_hint", ""))
+
+                if not pub_dt:
+                    continue
 
-            if not (start_dt <= pub_dt < end_dt):
-                continue
+                if not (start_dt <= pub_dt < end_dt):
+                    continue
 
-            title = detail.get("title") or c.get("title_hint") or "Untitled"
-            doc_type = c.get("doc_type") or "MPC Document"
-            text = detail.get("text") or ""
-            pdf_urls = detail.get("pdf_urls") or []
+                title = detail.get("title") or c.get("title_hint") or "Untitled"
+                doc_type = c.get("doc_type") or "MPC Document"
+                text = detail.get("text") or ""
+                pdf_urls = detail.get("pdf_urls") or []
 
-            text_path = storage.put_text(self.name, doc_id, text)
+                text_path = storage.put_text(self.name, doc_id, text)
 
-            pdf_paths: List[str] = []
-            for idx, pdf_url in enumerate(pdf_urls, start=1):
-                if not _is_pdf(pdf_url):
-                    continue
+                pdf_paths: List[str] = []
+                for idx, pdf_url in enumerate(pdf_urls, start=1):
+                    if not _is_pdf(pdf_url):
+                        continue
                
-                if storage.pdf_seen(self.name, pdf_url):
-                    continue
-                try:
-                    r = self.sess.get(pdf_url, timeout=60)
-                    if r.status_code == 200 and r.content:
-                        pdf_paths.append(storage.put_pdf(self.name, doc_id, pdf_url, r.content, idx=idx))
-                except Exception:
-                    pass
-
-            rec = make_record(
-                source=self.name,
-                doc_id=doc_id,
-                url=doc_url,
-                title=title,
-                pub_dt=pub_dt,
-                language="en",
-                doc_type=doc_type,
-                text_path=text_path,
-                pdf_urls=pdf_urls,
-                pdf_paths=pdf_paths,
-                meta={
-                    "country": "Turkey",
-                    "source_name": "Central Bank of the Republic of Türkiye",
-                    "source_url": c.get("source_url") or "",
-                },
-            )
-
-            out.append(rec)
-            time.sleep(self.sleep_s)
+                    if storage.pdf_seen(self.name, pdf_url):
+                        continue
+                    try:
+                        self._limiter.wait()
+                        with self.sess.get(pdf_url, timeout=60, stream=True) as r:
+                            if r.status_code == 200:
+                                pdf_paths.append(storage.put_pdf_stream(
+                                    self.name, doc_id, pdf_url, r.iter_content(chunk_size=64 * 1024), idx=idx
+                                ))
+                    except Exception:
+                        pass
+
+                rec = make_record(
+                    source=self.name,
+                    doc_id=doc_id,
+                    url=doc_url,
+                    title=title,
+                    pub_dt=pub_dt,
+                    language="en",
+                    doc_type=doc_type,
+                    text_path=text_path,
+                    pdf_urls=pdf_urls,
+                    pdf_paths=pdf_paths,
+                    meta={
+                        "country": "Turkey",
+                        "source_name": "Central Bank of the Republic of Türkiye",
+                        "source_url": c.get("source_url") or "",
+                    },
+                )
+
+                out.append(rec)
 
         return out
\ No newline at end of file
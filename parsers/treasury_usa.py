@@ -2,39 +2,29 @@ from __future__ import annotations
 
 import hashlib
 import re
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Optional
 from urllib.parse import urljoin
 
 import requests
+import soupsieve
 from bs4 import BeautifulSoup
-from dateutil import parser as dparser
 
 from parsers.base import DocumentRecord
+from parsers._dates import parse_date
+from parsers._http import RateLimiter, build_adapter, build_session, capped_join, collapse_ws, get_listing_html
 from storage.local import LocalStorage
 
 
 SLEEP_DEFAULT = 0.2
 
+_MONTHNAME_DATE_RE = re.compile(r"\b([A-Za-z]+ \d{1,2}, \d{4})\b")
+_ISO_DATE_RE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
 
-def _session() -> requests.Session:
-    s = requests.Session()
-    s.headers.update(
-        {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120 Safari/537.36"
-            ),
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-    )
-    return s
-
-
-def _clean(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip())
+# фильтр по href делает движок селекторов; select_one останавливается на первом PDF
+_PDF_LINK_SEL = soupsieve.compile('a[href$=".pdf" i], a[href*=".pdf?" i]')
+_PRESS_LINK_SEL = soupsieve.compile('a[href*="/news/press-releases/"]')
 
 
 def _abs_url(base: str, href: str) -> str:
@@ -46,103 +36,157 @@ def _abs_url(base: str, href: str) -> str:
     return urljoin(base, href)
 
 
-def _extract_title(soup: BeautifulSoup) -> str:
-    h1 = soup.find("h1")
-    if h1:
-        t = _clean(h1.get_text(" ", strip=True))
+_META_KEYS = [
+    ("property", "article:published_time"),
+    ("name", "date"),
+    ("name", "dc.date"),
+    ("name", "dc.date.issued"),
+    ("name", "pubdate"),
+    ("name", "publication_date"),
+    ("itemprop", "datePublished"),
+]
+
+_BAD_TAGS = ("script", "style", "noscript", "header", "footer", "nav", "aside")
+_SCAN_TAGS = ["h1", "title", "meta", "time", "article", "main", *_BAD_TAGS]
+
+
+class _Page:
+    __slots__ = ("h1", "title", "metas", "times", "article", "main", "bad")
+
+    def __init__(self) -> None:
+        self.h1 = None
+        self.title = None
+        self.metas: dict = {}
+        self.times: list = []
+        self.article: list = []
+        self.main: list = []
+        self.bad: list = []
+
+
+def _scan(soup: BeautifulSoup) -> _Page:
+
+    # один проход по дереву вместо отдельных find/find_all в каждом _extract_*
+    page = _Page()
+    for el in soup.find_all(_SCAN_TAGS):
+        name = el.name
+        if name == "h1":
+            if page.h1 is None:
+                page.h1 = el
+        elif name == "title":
+            if page.title is None:
+                page.title = el
+        elif name == "meta":
+            for attr, key in _META_KEYS:
+                if el.get(attr) == key:
+                    page.metas.setdefault((attr, key), el)
+        elif name == "time":
+            page.times.append(el)
+        elif name == "article":
+            page.article.append(el)
+        elif name == "main":
+            page.main.append(el)
+        else:
+            page.bad.append(el)
+    return page
+
+
+def _extract_title(page: _Page) -> str:
+    if page.h1:
+        t = collapse_ws(page.h1.get_text(" ", strip=True))
         if t:
             return t
-    if soup.title and soup.title.get_text():
-        return _clean(soup.title.get_text())
+    if page.title and page.title.get_text():
+        return collapse_ws(page.title.get_text())
     return "Untitled"
 
 
-def _extract_date(soup: BeautifulSoup) -> Optional[datetime]:
+def _extract_date(soup: BeautifulSoup, page: _Page) -> Optional[datetime]:
     candidates: List[str] = []
 
     # meta
-    meta_keys = [
-        ("property", "article:published_time"),
-        ("name", "date"),
-        ("name", "dc.date"),
-        ("name", "dc.date.issued"),
-        ("name", "pubdate"),
-        ("name", "publication_date"),
-        ("itemprop", "datePublished"),
-    ]
-    for attr, key in meta_keys:
-        m = soup.find("meta", attrs={attr: key})
+    for mk in _META_KEYS:
+        m = page.metas.get(mk)
         if m and m.get("content"):
             candidates.append(m["content"])
 
     # time tags
-    for t in soup.find_all("time"):
+    for t in page.times:
         if t.get("datetime"):
             candidates.append(t["datetime"])
-        tt = _clean(t.get_text(" ", strip=True))
+        tt = collapse_ws(t.get_text(" ", strip=True))
         if tt:
             candidates.append(tt)
 
     for cand in candidates:
-        try:
-            dt = dparser.parse(cand, fuzzy=True)
-            return dt.replace(tzinfo=None) if getattr(dt, "tzinfo", None) else dt
-        except Exception:
-            continue
+        dt = parse_date(cand.strip())
+        if dt:
+            return dt
 
     # fallback by visible text
     head_text = soup.get_text(" ", strip=True)[:1500]
-    m = re.search(r"\b([A-Za-z]+ \d{1,2}, \d{4})\b", head_text)
+    m = _MONTHNAME_DATE_RE.search(head_text)
     if m:
-        try:
-            return dparser.parse(m.group(1), fuzzy=True)
-        except Exception:
-            pass
+        dt = parse_date(m.group(1))
+        if dt:
+            return dt
 
-    m2 = re.search(r"\b(\d{4}-\d{2}-\d{2})\b", head_text)
+    m2 = _ISO_DATE_RE.search(head_text)
     if m2:
-        try:
-            return dparser.parse(m2.group(1))
-        except Exception:
-            pass
+        dt = parse_date(m2.group(1))
+        if dt:
+            return dt
 
     return None
 
 
-def _extract_text(soup: BeautifulSoup) -> str:
-    for bad in soup(["script", "style", "noscript", "header", "footer", "nav", "aside"]):
+def _extract_text(soup: BeautifulSoup, page: _Page) -> str:
+    for bad in page.bad:
         bad.decompose()
 
-    node = soup.find("article") or soup.find("main") or soup.body
+    # article/main внутри удалённых header/nav/... не считаются, как и раньше
+    node = (
+        next((el for el in page.article if not el.decomposed), None)
+        or next((el for el in page.main if not el.decomposed), None)
+        or soup.body
+    )
     if not node:
         return ""
 
-    txt = node.get_text(" ", strip=True)
-    return _clean(txt)[:150000]
+    # _clean по кускам даёт то же, что _clean всей строки: куски уже без краевых пробелов
+    return capped_join((collapse_ws(t) for t in node.stripped_strings), " ", 150000)
 
 
 def _find_first_pdf(soup: BeautifulSoup, base: str) -> Optional[str]:
-    for a in soup.find_all("a", href=True):
-        href = (a.get("href") or "").strip()
-        if not href:
-            continue
-        hl = href.lower()
-        if hl.endswith(".pdf") or ".pdf?" in hl:
-            return _abs_url(base, href)
-    return None
+    a = _PDF_LINK_SEL.select_one(soup)
+    return _abs_url(base, a["href"]) if a else None
 
 
 class TreasuryUSAParser:
     name = "treasury_us"
 
-    def __init__(self, sleep_s: float = SLEEP_DEFAULT, max_pages: int = 10, debug: bool = False):
+    HEADERS = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/120 Safari/537.36"
+        ),
+        "Accept-Language": "en-US,en;q=0.9",
+    }
+
+    # своего цикла повторов нет - ретраит адаптер сессии
+    HTTP_RETRIES = True
+
+    def __init__(self, sleep_s: float = SLEEP_DEFAULT, max_pages: int = 10, debug: bool = False, workers: int = 8, session: Optional[requests.Session] = None):
         self.sleep_s = sleep_s
         self.max_pages = max_pages
         self.debug = debug
+        self.workers = workers
+        self._limiter = RateLimiter(sleep_s)
+        self._doc_id_base = hashlib.sha1(f"{self.name}|".encode("utf-8"))
 
         self.base_url = "https://home.treasury.gov"
         self.main_url = "https://home.treasury.gov/news/press-releases"
-        self.sess = _session()
+        self.sess = session or build_session(self.HEADERS, build_adapter(self.HTTP_RETRIES))
 
         self.MAX_PDF = 1
 
@@ -156,36 +200,55 @@ class TreasuryUSAParser:
             print(f"[{self.name}] ERROR GET {url}: {e}")
             return None
 
-    def _download(self, url: str) -> Optional[bytes]:
+    def _doc_id(self, url: str) -> str:
+        # sha1("<name>|<url>"), префикс захеширован один раз в __init__
+        h = self._doc_id_base.copy()
+        h.update(url.encode("utf-8"))
+        return h.hexdigest()
+
+    def _fetch_page(self, url: str) -> Optional[str]:
+        self._limiter.wait()
+        return self._get(url)
+
+    def _get_listing(self, url: str, storage: LocalStorage) -> Optional[str]:
+        # индексные страницы: условный GET (ETag / Last-Modified), тело из кэша на 304
+        self._limiter.wait()
+        try:
+            return get_listing_html(self.sess, url, storage, self.name, timeout=30)
+        except Exception as e:
+            print(f"[{self.name}] ERROR GET {url}: {e}")
+            return None
+
+    def _download(self, url: str, storage: LocalStorage, doc_id: str, idx: int) -> Optional[str]:
+        # PDF пишется на диск по мере загрузки; возвращает путь сохранённого файла
         try:
-            r = self.sess.get(url, timeout=60)
-            if r.status_code == 200 and r.content:
-                return r.content
+            self._limiter.wait()
+            with self.sess.get(url, timeout=60, stream=True) as r:
+                if r.status_code == 200:
+                    return storage.put_pdf_stream(
+                        self.name, doc_id, url, r.iter_content(chunk_size=64 * 1024), idx=idx
+                    )
         except Exception:
             pass
         return None
 
-    def _list_links(self) -> List[str]:
+    def _list_links(self, storage: LocalStorage) -> List[str]:
         links: List[str] = []
 
         for page in range(self.max_pages):
             url = self.main_url if page == 0 else f"{self.main_url}?page={page}"
-            html = self._get(url)
+            html = self._get_listing(url, storage)
             if not html:
                 continue
 
-            soup = BeautifulSoup(html, "html.parser")
+            soup = BeautifulSoup(html, "lxml")
 
             page_links: List[str] = []
-            for a in soup.find_all("a", href=True):
-                href = (a.get("href") or "").strip()
-                if not href:
+            for a in _PRESS_LINK_SEL.select(soup):
+                full = _abs_url(self.base_url, a["href"])
+                if full.rstrip("/") == self.main_url.rstrip("/"):
                     continue
-                if "/news/press-releases/" in href:
-                    full = _abs_url(self.base_url, href)
-                    if full.rstrip("/") == self.main_url.rstrip("/"):
-                        continue
-                    page_links.append(full)
+                page_links.append(full)
 
             page_links = sorted(set(page_links))
             if not page_links:
@@ -193,77 +256,71 @@ class TreasuryUSAParser:
 
             links.extend(page_links)
 
-            if self.sleep_s:
-                time.sleep(self.sleep_s)
-
         return sorted(set(links))
 
     def fetch_range(self, start_dt: datetime, end_dt: datetime, storage: LocalStorage) -> List[DocumentRecord]:
-        links = self._list_links()
+        links = self._list_links(storage)
         if not links:
             return []
 
         out: List[DocumentRecord] = []
 
-        for url in links:
-            html = self._get(url)
-            if not html:
-                continue
+        # doc_id зависит только от URL - уже сохранённые релизы отсеиваем до загрузки
+        keyed = [(url, self._doc_id(url)) for url in links]
+        existing = storage.exists_batch(self.name, (doc_id for _, doc_id in keyed))
+        todo = [x for x in keyed if x[1] not in existing]
 
-            soup = BeautifulSoup(html, "html.parser")
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            pages = ex.map(self._fetch_page, [url for url, _ in todo])
+            for (url, doc_id), html in zip(todo, pages):
+                if not html:
+                    continue
 
-            title = _extract_title(soup)
-            pub_dt = _extract_date(soup)
+                soup = BeautifulSoup(html, "lxml")
 
-            if pub_dt is None:
-                if self.debug:
-                    print(f"[{self.name}] no date: {url}")
-                continue
+                page = _scan(soup)
 
-            if not (start_dt <= pub_dt < end_dt):
-                continue
+                title = _extract_title(page)
+                pub_dt = _extract_date(soup, page)
 
-            doc_id = hashlib.sha1(f"{self.name}|{url}".encode("utf-8")).hexdigest()
-            if storage.exists(self.name, doc_id):
-                continue
+                if pub_dt is None:
+                    if self.debug:
+                        print(f"[{self.name}] no date: {url}")
+                    continue
+
+                if not (start_dt <= pub_dt < end_dt):
+                    continue
 
-            text = _extract_text(soup)
-
-            pdf_urls: List[str] = []
-            pdf_blobs: List[bytes] = []
-
-            pdf_url = _find_first_pdf(soup, self.base_url)
-            if pdf_url:
-                blob = self._download(pdf_url)
-                if blob:
-                    pdf_urls.append(pdf_url)
-                    pdf_blobs.append(blob)
-
-            saved_pdf_paths: List[str] = []
-            for idx, (purl, blob) in enumerate(zip(pdf_urls, pdf_blobs), start=1):
-                saved_pdf_paths.append(storage.put_pdf(self.name, doc_id, purl, blob, idx=idx))
-
-            rec = DocumentRecord(
-                doc_id=doc_id,
-                source=self.name,
-                url=url,
-                title=title,
-                date=pub_dt.date().isoformat(),
-                language="en",
-                doc_type="Press Release",
-                text=text or "",
-                pdf_urls=pdf_urls,
-                meta={
-                    "country": "USA",
-                    "source_name": "U.S. Department of the Treasury",
-                    "source_url": self.main_url,
-                    "saved_pdf_paths": saved_pdf_paths,
-                },
-            )
-
-            out.append(rec)
-
-            if self.sleep_s:
-                time.sleep(self.sleep_s)
+                text = _extract_text(soup, page)
+
+                pdf_urls: List[str] = []
+                saved_pdf_paths: List[str] = []
+
+                pdf_url = _find_first_pdf(soup, self.base_url)
+                if pdf_url:
+                    path = self._download(pdf_url, storage, doc_id, idx=1)
+                    if path:
+                        pdf_urls.append(pdf_url)
+                        saved_pdf_paths.append(path)
+
+                rec = DocumentRecord(
+                    doc_id=doc_id,
+                    source=self.name,
+                    url=url,
+                    title=title,
+                    date=pub_dt.date().isoformat(),
+                    language="en",
+                    doc_type="Press Release",
+                    text=text or "",
+                    pdf_urls=pdf_urls,
+                    meta={
+                        "country": "USA",
+                        "source_name": "U.S. Department of the Treasury",
+                        "source_url": self.main_url,
+                        "saved_pdf_paths": saved_pdf_paths,
+                    },
+                )
+
+                out.append(rec)
 
         return out
\ No newline at end of file
@@ -2,15 +2,21 @@ from __future__ import annotations
 
 import argparse
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
 import time
 import traceback
-from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing, contextmanager
+from functools import partial
 from datetime import datetime, timedelta
 from pathlib import Path
 
 from storage.local import LocalStorage
 
+from parsers._http import build_adapter, build_session
 from parsers.oenb import OeNBParser
 from parsers.acpr import ACPRParser
 from parsers.boe import BoEParser
@@ -33,33 +39,50 @@ from parsers.fed_press_usa import FedPressReleasesParser
 from parsers.treasury_usa import TreasuryUSAParser
 
 
+# парсеры создаются в каждом run_once заново, с общим на прогон пулом соединений;
+# здесь только класс и аргументы конструктора
 PARSERS = [
-    BoEParser(sleep_s=0.2, max_items=200, debug=False),
-    NBSParser(sleep_s=0.2),
-    MNBParser(sleep_s=0.2),
-    OeNBParser(sleep_s=0.2),
-    ACPRParser(sleep_s=0.2, max_pages=30),
-    NBKZParser(sleep_s=0.2),
-    BNMParser(sleep_s=0.2, max_pages=5),
-    TCMBParser(sleep_s=0.2, years_back=2),
-    BDESpainParser(sleep_s=0.2),
-    BoCParser(sleep_s=0.2),
-    CBAArmeniaParser(),
-    CBSLSriLankaParser(),
-    ESRBParser(sleep_s=0.2),
-    CFPBParser(sleep_s=0.2),
-    ICMANewsParser(sleep_s=0.2),
-    OCCParser(sleep_s=0.2),
-    FSCKoreaParser(sleep_s=0.2),
-    NGFSParser(sleep_s=0.2),
-    FedPressReleasesParser(sleep_s=0.2),
-    TreasuryUSAParser(sleep_s=0.2),
+    (BoEParser, dict(sleep_s=0.2, max_items=200, debug=False)),
+    (NBSParser, dict(sleep_s=0.2)),
+    (MNBParser, dict(sleep_s=0.2)),
+    (OeNBParser, dict(sleep_s=0.2)),
+    (ACPRParser, dict(sleep_s=0.2, max_pages=30)),
+    (NBKZParser, dict(sleep_s=0.2)),
+    (BNMParser, dict(sleep_s=0.2, max_pages=5)),
+    (TCMBParser, dict(sleep_s=0.2, years_back=2)),
+    (BDESpainParser, dict(sleep_s=0.2)),
+    (BoCParser, dict(sleep_s=0.2)),
+    (CBAArmeniaParser, {}),
+    (CBSLSriLankaParser, {}),
+    (ESRBParser, dict(sleep_s=0.2)),
+    (CFPBParser, dict(sleep_s=0.2)),
+    (ICMANewsParser, dict(sleep_s=0.2)),
+    (OCCParser, dict(sleep_s=0.2)),
+    (FSCKoreaParser, dict(sleep_s=0.2)),
+    (NGFSParser, dict(sleep_s=0.2)),
+    (FedPressReleasesParser, dict(sleep_s=0.2)),
+    (TreasuryUSAParser, dict(sleep_s=0.2)),
 ]
 
 
 # logging helpers
 
 
+# запись в файл и в консоль идёт в отдельном потоке: logger.info и print из парсеров
+# только кладут запись в очередь
+_LISTENER: logging.handlers.QueueListener | None = None
+
+
+def stop_logging() -> None:
+    global _LISTENER
+    if _LISTENER is None:
+        return
+    _LISTENER.stop()
+    for h in _LISTENER.handlers:
+        h.close()
+    _LISTENER = None
+
+
 def setup_logging(logdir: str, level: str) -> logging.Logger:
     Path(logdir).mkdir(parents=True, exist_ok=True)
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -80,8 +103,15 @@ def setup_logging(logdir: str, level: str) -> logging.Logger:
     sh.setFormatter(fmt)
     sh.setLevel(logger.level)
 
-    logger.addHandler(fh)
-    logger.addHandler(sh)
+    # прошлый listener (hourly / weekly цикл) дописывает очередь и закрывает свой файл
+    stop_logging()
+
+    global _LISTENER
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    _LISTENER = logging.handlers.QueueListener(q, fh, sh, respect_handler_level=True)
+    _LISTENER.start()
+
+    logger.addHandler(logging.handlers.QueueHandler(q))
 
     logger.info(f"logfile: {logfile}")
     return logger
@@ -92,24 +122,32 @@ class _StreamToLogger:
     def __init__(self, logger: logging.Logger, level: int):
         self.logger = logger
         self.level = level
-        self._buf = ""
+        # куски без \n копятся в списке и склеиваются один раз, когда строка закончилась
+        self._parts: list[str] = []
+        # парсеры печатают из разных потоков - буфер общий, строки не должны смешиваться
+        self._lock = threading.Lock()
 
     def write(self, msg: str) -> None:
         if not msg:
             return
-        self._buf += msg
-        while "\n" in self._buf:
-            line, self._buf = self._buf.split("\n", 1)
-            line = line.rstrip()
-            if line:
-                self.logger.log(self.level, line)
+        with self._lock:
+            self._parts.append(msg)
+            if "\n" not in msg:
+                return
+            *lines, tail = "".join(self._parts).split("\n")
+            self._parts = [tail] if tail else []
+            for line in lines:
+                line = line.rstrip()
+                if line:
+                    self.logger.log(self.level, line)
 
     def flush(self) -> None:
         # дописываем хвост без \n
-        tail = self._buf.strip()
-        if tail:
-            self.logger.log(self.level, tail)
-        self._buf = ""
+        with self._lock:
+            tail = "".join(self._parts).strip()
+            if tail:
+                self.logger.log(self.level, tail)
+            self._parts = []
 
 
 @contextmanager
@@ -147,11 +185,60 @@ def next_hour_boundary() -> datetime:
     return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
 
 
+def next_after(prev: datetime | None, step: timedelta, fallback) -> datetime:
+    # следующий запуск - от предыдущего, а не от now(): расписание не уползает;
+    # если прогон занял больше шага, пропущенные слоты не догоняем
+    if prev is not None:
+        nxt = prev + step
+        if nxt > datetime.now():
+            return nxt
+    return fallback()
+
+
+def sleep_until(run_at: datetime) -> None:
+    # стенные часы - только чтобы получить интервал; само ожидание по monotonic,
+    # которому не страшны NTP-коррекции и переход на летнее время
+    deadline = time.monotonic() + max(0.0, (run_at - datetime.now()).total_seconds())
+    while True:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return
+        time.sleep(left)
+
+
 
 # runner
 
 
-def run_once(root: str, days: int, logger: logging.Logger) -> int:
+def _run_one(make_parser, start_dt: datetime, end_dt: datetime, storage: LocalStorage, logger: logging.Logger) -> int:
+    p0 = time.time()
+    parser = make_parser()
+    logger.info(f"RUN: {parser.name}")
+
+    # все записи источника в index.sqlite - одной транзакцией на прогон парсера
+    with storage.batch(parser.name):
+        try:
+            records = parser.fetch_range(start_dt, end_dt, storage)
+        except Exception:
+            logger.error(f"[{parser.name}] crashed in fetch_range:\n{traceback.format_exc()}")
+            return 0
+
+        saved = 0
+        for rec in records:
+            try:
+                if storage.put_record(rec):
+                    saved += 1
+            except Exception:
+                logger.error(
+                    f"[{parser.name}] failed to save record {getattr(rec, 'doc_id', '?')}:\n{traceback.format_exc()}"
+                )
+
+    dt = time.time() - p0
+    logger.info(f"[{parser.name}] new: {saved} | time: {dt:.2f}s")
+    return saved
+
+
+def run_once(root: str, days: int, logger: logging.Logger, workers: int = 8) -> int:
     end_dt = datetime.now()
     start_dt = end_dt - timedelta(days=days)
 
@@ -162,30 +249,34 @@ def run_once(root: str, days: int, logger: logging.Logger) -> int:
     t0 = time.time()
 
    
-    with redirect_prints_to_logger(logger):
-        for parser in PARSERS:
-            p0 = time.time()
-            logger.info(f"RUN: {parser.name}")
-
-            try:
-                records = parser.fetch_range(start_dt, end_dt, storage)
-            except Exception:
-                logger.error(f"[{parser.name}] crashed in fetch_range:\n{traceback.format_exc()}")
-                continue
-
-            saved = 0
-            for rec in records:
+    # общие пулы соединений (keep-alive) на все парсеры, свежие на каждый прогон:
+    # в недельном режиме соединения между запусками всё равно протухают.
+    # Адаптеров два: без повторов и с Retry для парсеров без своего цикла (HTTP_RETRIES).
+    # Сессия у каждого парсера своя - со своими заголовками (cls.HEADERS)
+    adapters = {False: build_adapter(), True: build_adapter(retries=True)}
+
+    # closing: соединения index.sqlite и пул живут до конца прогона
+    # парсеры ходят на разные хосты и почти всё время ждут сеть - гоняем их параллельно;
+    # у каждого свой источник в storage (своя транзакция и свой lock на index.sqlite)
+    with closing(storage), closing(adapters[False]), closing(adapters[True]), redirect_prints_to_logger(logger):
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            futures = {
+                ex.submit(
+                    _run_one,
+                    partial(
+                        cls,
+                        session=build_session(cls.HEADERS, adapters[getattr(cls, "HTTP_RETRIES", False)]),
+                        **kwargs,
+                    ),
+                    start_dt, end_dt, storage, logger,
+                ): cls
+                for cls, kwargs in PARSERS
+            }
+            for fut in as_completed(futures):
                 try:
-                    storage.put_record(rec)
-                    saved += 1
+                    total_new += fut.result()
                 except Exception:
-                    logger.error(
-                        f"[{parser.name}] failed to save record {getattr(rec, 'doc_id', '?')}:\n{traceback.format_exc()}"
-                    )
-
-            dt = time.time() - p0
-            logger.info(f"[{parser.name}] new: {saved} | time: {dt:.2f}s")
-            total_new += saved
+                    logger.error(f"[{futures[fut].name}] crashed:\n{traceback.format_exc()}")
 
     logger.info(f"TOTAL new records saved: {total_new} | total time: {time.time()-t0:.2f}s")
     return total_new
@@ -204,6 +295,8 @@ def main():
     ap.add_argument("--once", action="store_true", help="run immediately once and exit")
     ap.add_argument("--every-hour", action="store_true", help="TEST MODE: run every hour on the hour")
 
+    ap.add_argument("--workers", type=int, default=8, help="parsers running in parallel (default: 8)")
+
     ap.add_argument("--logdir", default="logs", help="log directory (default: logs)")
     ap.add_argument("--loglevel", default="INFO", help="INFO/WARNING/ERROR/DEBUG (default: INFO)")
 
@@ -211,20 +304,21 @@ def main():
     logger = setup_logging(args.logdir, args.loglevel)
 
     if args.once:
-        run_once(args.root, args.days, logger)
+        run_once(args.root, args.days, logger, workers=args.workers)
         return
 
     if args.every_hour:
         logger.warning("RUNNING IN TEST MODE: every hour (on the hour)")
+        run_at = None
         while True:
             try:
-                run_at = next_hour_boundary()
+                run_at = next_after(run_at, timedelta(hours=1), next_hour_boundary)
                 logger.info(f"next hourly run at: {run_at:%Y-%m-%d %H:%M:%S}")
-                time.sleep(max(0.0, (run_at - datetime.now()).total_seconds()))
+                sleep_until(run_at)
 
                 
                 logger = setup_logging(args.logdir, args.loglevel)
-                run_once(args.root, args.days, logger)
+                run_once(args.root, args.days, logger, workers=args.workers)
 
             except KeyboardInterrupt:
                 logger.warning("stopped by user")
@@ -234,17 +328,18 @@ def main():
                 time.sleep(60)
 
     logger.info(f"WEEKLY MODE: weekday={args.weekday} hour={args.hour} minute={args.minute}")
+    run_at = None
     while True:
         try:
-            run_at = next_run_at(args.weekday, args.hour, args.minute)
+            run_at = next_after(
+                run_at, timedelta(days=7), lambda: next_run_at(args.weekday, args.hour, args.minute)
+            )
             logger.info(f"next weekly run at: {run_at:%Y-%m-%d %H:%M:%S}")
-            time.sleep(max(0.0, (run_at - datetime.now()).total_seconds()))
+            sleep_until(run_at)
 
             
             logger = setup_logging(args.logdir, args.loglevel)
-            run_once(args.root, args.days, logger)
-
-            time.sleep(5)
+            run_once(args.root, args.days, logger, workers=args.workers)
 
         except KeyboardInterrupt:
             logger.warning("stopped by user")
@@ -255,4 +350,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        stop_logging()
\ No newline at end of file
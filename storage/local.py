@@ -1,16 +1,33 @@
 from __future__ import annotations
 
+import gzip
 import json
+import os
 import sqlite3
 import hashlib
 import re
+import sys
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from dataclasses import asdict
+from typing import BinaryIO, Iterable
 from datetime import datetime, date
 from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
 
 from parsers.base import DocumentRecord
 
+try:
+    # необязательная зависимость: заметно быстрее json на больших meta/text
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_BAD_CHARS_RE = re.compile(r"[^\w.\-() ]+", re.UNICODE)
+_WS_RE = re.compile(r"\s+")
+_NAME_OK_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9._\-]{2,}")
+
 
 def _json_default(o):
     if isinstance(o, (datetime, date)):
@@ -18,13 +35,45 @@ def _json_default(o):
     return str(o)
 
 
+def _dumps_line(obj) -> bytes:
+    # готовая строка records.jsonl в utf-8, без пробелов после , и :
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                obj,
+                default=_json_default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE,
+            )
+        except TypeError:
+            # напр. int больше 64 бит - пусть разбирается json
+            pass
+    line = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+    return (line + "\n").encode("utf-8")
+
+
+# PDF пишутся один раз и больше не читаются: крупные сразу отпускаем из page cache,
+# чтобы недельный прогон не вытеснял из памяти что-то полезное.
+# DONTNEED отбрасывает только чистые страницы - поэтому сначала fdatasync
+_FADVISE_MIN_BYTES = 256 * 1024
+
+
+def _drop_page_cache(fd: int, size: int) -> None:
+    if size <= _FADVISE_MIN_BYTES or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.fdatasync(fd)
+        os.posix_fadvise(fd, 0, size, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+
+
 def _safe_filename(name: str, max_len: int = 160) -> str:
 
     name = (name or "").strip()
     name = unquote(name)
     name = name.replace("\x00", "")
-    name = re.sub(r"[^\w.\-() ]+", "_", name, flags=re.UNICODE)
-    name = re.sub(r"\s+", " ", name).strip()
+    name = _BAD_CHARS_RE.sub("_", name)
+    name = _WS_RE.sub(" ", name).strip()
 
     if len(name) > max_len:
         if "." in name:
@@ -35,7 +84,104 @@ def _safe_filename(name: str, max_len: int = 160) -> str:
         base = base[: max_len - len(ext)]
         name = base + ext
 
-    return name
+    # одинаковые имена (report.pdf, index.pdf, ...) из разных URL - одна строка в памяти
+    return sys.intern(name)
+
+
+_DROP_QUERY_KEYS = frozenset({
+    "_", "ts", "timestamp", "t", "v", "ver", "version",
+    "cb", "cachebust", "cachebuster", "nocache", "rnd", "random",
+    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+})
+
+
+# чистые функции от URL: один и тот же PDF проверяется (pdf_seen) и сохраняется
+# (put_pdf) подряд - ключ считается один раз
+@lru_cache(maxsize=8192)
+def _normalize_pdf_url(pdf_url: str) -> str:
+    u = (pdf_url or "").strip()
+    if not u:
+        return u
+
+    parts = urlsplit(u)
+    q = parse_qsl(parts.query, keep_blank_values=True)
+
+    q2 = []
+    for k, v in q:
+        if (k or "").lower() in _DROP_QUERY_KEYS:
+            continue
+        q2.append((k, v))
+
+    q2.sort()
+    new_query = urlencode(q2, doseq=True)
+
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, new_query, ""))
+
+
+# ключ дедупликации, не подпись: blake2b-128 дешевле sha1 и даёт 32 hex-символа
+@lru_cache(maxsize=8192)
+def _pdf_key(pdf_url: str) -> str:
+    norm = _normalize_pdf_url(pdf_url)
+    return hashlib.blake2b(norm.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# старые индексы хранят sha1 (40 hex-символов); новые записи идут под blake2b,
+# а старые находятся по этому ключу без миграции таблицы
+def _legacy_pdf_key(pdf_url: str) -> str:
+    norm = _normalize_pdf_url(pdf_url)
+    return hashlib.sha1(norm.encode("utf-8")).hexdigest()
+
+
+_BAD_LAST_SEGMENTS = frozenset({
+    "", "download", "file", "get", "print", "view", "open", "attachment",
+    "document", "content", "pdf", "export",
+})
+
+
+# имя файла зависит только от URL; один и тот же URL приходит и из разных парсеров
+@lru_cache(maxsize=4096)
+def _pdf_name_from_url(pdf_url: str) -> str | None:
+    try:
+        u = (pdf_url or "").strip()
+        if not u:
+            return None
+
+        parts = urlsplit(u)
+        path = parts.path or ""
+        last = unquote(path.split("/")[-1]).strip()
+
+        if last.lower().endswith(".pdf") and len(last) >= 5:
+            return _safe_filename(last)
+
+        if "/printpdf/" in path:
+            if last and last.lower() not in _BAD_LAST_SEGMENTS:
+                return _safe_filename(last + ".pdf")
+
+        if last and last.lower() not in _BAD_LAST_SEGMENTS:
+            if _NAME_OK_RE.fullmatch(last):
+                return _safe_filename(last + ".pdf")
+
+    except Exception:
+        pass
+
+    return None
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (doc_id TEXT PRIMARY KEY);
+
+CREATE TABLE IF NOT EXISTS pdf_seen (
+    pdf_key TEXT PRIMARY KEY,
+    path TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS http_cache (
+    url_key TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB NOT NULL
+);
+"""
 
 
 class LocalStorage:
@@ -46,199 +192,356 @@ class LocalStorage:
       pdf/
     """
 
-    DROP_QUERY_KEYS = {
-        "_", "ts", "timestamp", "t", "v", "ver", "version",
-        "cb", "cachebust", "cachebuster", "nocache", "rnd", "random",
-        "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
-    }
+    DROP_QUERY_KEYS = _DROP_QUERY_KEYS
 
    
-    BAD_LAST_SEGMENTS = {
-        "", "download", "file", "get", "print", "view", "open", "attachment",
-        "document", "content", "pdf", "export",
-    }
+    BAD_LAST_SEGMENTS = _BAD_LAST_SEGMENTS
 
     def __init__(self, root: str = "data"):
         self.root = Path(root)
         self.root.mkdir(parents=True, exist_ok=True)
 
+        # одно соединение на источник на всё время жизни storage (до close());
+        # запросы к одному index.sqlite сериализуются своим RLock - storage
+        # вызывается и из потоков пулов в парсерах
+        self._conns: dict[str, sqlite3.Connection] = {}
+        self._locks: dict[str, threading.RLock] = {}
+        self._conns_lock = threading.Lock()
+
+        # источники внутри batch(): commit откладывается до commit_batch
+        self._batch: set[str] = set()
+
+        # открытые records.jsonl; сбрасываются на диск перед каждым commit в index.sqlite,
+        # чтобы seen не опережал сами записи
+        self._jsonl: dict[str, BinaryIO] = {}
+
+        # источники, для которых каталоги data/<source>/pdf уже созданы
+        self._ready: set[str] = set()
+
+        # копии таблиц seen / pdf_seen в памяти: грузятся целиком при первом обращении,
+        # дальше exists / pdf_seen - поиск в set / dict без SQL
+        self._seen_cache: dict[str, set[str]] = {}
+        self._pdf_cache: dict[str, dict[str, str]] = {}
+
+        # источники, в pdf_seen которых остались ключи sha1
+        self._pdf_legacy: set[str] = set()
+
+        # PDF, которые в этом запуске уже записаны или найдены на диске:
+        # повторно их не stat-им
+        self._known_pdf_paths: set[str] = set()
+
+        # источники, для которых таблицы index.sqlite уже созданы; переживает close(),
+        # так что повторное открытие соединения обходится без DDL
+        self._schemas_ready: set[str] = set()
+
  
     def _source_dir(self, source: str) -> Path:
         d = self.root / source
+        if source in self._ready:
+            return d
         d.mkdir(parents=True, exist_ok=True)
         (d / "pdf").mkdir(parents=True, exist_ok=True)
+        self._ready.add(source)
         return d
 
     def _db(self, source: str) -> sqlite3.Connection:
-        d = self._source_dir(source)
-        conn = sqlite3.connect(str(d / "index.sqlite"))
-
-        conn.execute("CREATE TABLE IF NOT EXISTS seen (doc_id TEXT PRIMARY KEY)")
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS pdf_seen (
-                pdf_key TEXT PRIMARY KEY,
-                path TEXT NOT NULL
-            )
-            """
-        )
-        return conn
-
-
-    def exists(self, source: str, doc_id: str) -> bool:
+        conn = self._conns.get(source)
+        if conn is not None:
+            return conn
+
+        with self._conns_lock:
+            conn = self._conns.get(source)
+            if conn is not None:
+                return conn
+
+            d = self._source_dir(source)
+            conn = sqlite3.connect(str(d / "index.sqlite"), check_same_thread=False)
+            # WAL + synchronous=NORMAL: fsync на checkpoint, а не на каждый commit
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+
+            if source not in self._schemas_ready:
+                conn.executescript(_SCHEMA)
+                self._schemas_ready.add(source)
+
+            self._locks[source] = threading.RLock()
+            self._conns[source] = conn
+            return conn
+
+    @contextmanager
+    def _conn(self, source: str):
         conn = self._db(source)
+        with self._locks[source]:
+            yield conn
+            if source not in self._batch:
+                self._commit(source, conn)
+
+    def _commit(self, source: str, conn: sqlite3.Connection) -> None:
+        f = self._jsonl.get(source)
+        if f is not None:
+            f.flush()
+        conn.commit()
+
+    def close(self) -> None:
+        with self._conns_lock:
+            for source, conn in self._conns.items():
+                with self._locks[source]:
+                    try:
+                        self._commit(source, conn)
+                    finally:
+                        conn.close()
+            for f in self._jsonl.values():
+                f.close()
+            self._jsonl.clear()
+            self._seen_cache.clear()
+            self._pdf_cache.clear()
+            self._pdf_legacy.clear()
+            self._known_pdf_paths.clear()
+            self._conns.clear()
+            self._locks.clear()
+            self._batch.clear()
+
+    # batch
+
+    def begin_batch(self, source: str) -> bool:
+        self._db(source)
+        with self._locks[source]:
+            if source in self._batch:
+                return False
+            self._batch.add(source)
+            return True
+
+    def commit_batch(self, source: str) -> None:
+        conn = self._conns.get(source)
+        if conn is None:
+            self._batch.discard(source)
+            return
+        with self._locks[source]:
+            self._batch.discard(source)
+            self._commit(source, conn)
+
+    @contextmanager
+    def batch(self, source: str):
+        """
+        Все записи в index.sqlite источника внутри блока идут одной транзакцией:
+        один commit (и один fsync) вместо commit на каждую запись.
+        """
+        started = self.begin_batch(source)
         try:
-            cur = conn.execute("SELECT 1 FROM seen WHERE doc_id = ?", (doc_id,))
-            return cur.fetchone() is not None
+            yield self
         finally:
-            conn.close()
+            if started:
+                self.commit_batch(source)
 
-    def mark_seen(self, source: str, doc_id: str) -> None:
-        conn = self._db(source)
-        try:
-            conn.execute("INSERT OR IGNORE INTO seen(doc_id) VALUES (?)", (doc_id,))
-            conn.commit()
-        finally:
-            conn.close()
 
+    def _seen(self, source: str) -> set[str]:
+        seen = self._seen_cache.get(source)
+        if seen is None:
+            with self._conn(source) as conn:
+                seen = self._seen_cache.get(source)
+                if seen is None:
+                    seen = {row[0] for row in conn.execute("SELECT doc_id FROM seen")}
+                    self._seen_cache[source] = seen
+        return seen
 
-    def put_record(self, record: DocumentRecord) -> None:
-        d = self._source_dir(record.source)
-        out = d / "records.jsonl"
+    def exists(self, source: str, doc_id: str) -> bool:
+        return doc_id in self._seen(source)
 
-        with out.open("a", encoding="utf-8") as f:
-            f.write(
-                json.dumps(
-                    asdict(record),
-                    ensure_ascii=False,
-                    default=_json_default,
-                )
-                + "\n"
-            )
+    def exists_batch(self, source: str, doc_ids: Iterable[str]) -> set[str]:
+        """
+        Какие из doc_ids уже есть в seen.
+        """
+        seen = self._seen(source)
+        return {doc_id for doc_id in doc_ids if doc_id in seen}
 
-        self.mark_seen(record.source, record.doc_id)
+    def mark_seen(self, source: str, doc_id: str) -> None:
+        seen = self._seen(source)
+        with self._conn(source) as conn:
+            conn.execute("INSERT OR IGNORE INTO seen(doc_id) VALUES (?)", (doc_id,))
+            seen.add(doc_id)
+
+
+    def _jsonl_file(self, source: str) -> BinaryIO:
+        f = self._jsonl.get(source)
+        if f is None:
+            out = self._source_dir(source) / "records.jsonl"
+            f = out.open("ab", buffering=1 << 20)
+            self._jsonl[source] = f
+        return f
+
+    def put_record(self, record: DocumentRecord) -> bool:
+        # False - запись уже есть (напр. пересекающиеся окна прогонов); в jsonl не дублируем
+        if self.exists(record.source, record.doc_id):
+            return False
+        # поверхностная копия полей: asdict рекурсивно копирует text, meta и списки,
+        # а запись сразу уходит в dumps; vars() подходит для любой dataclass-записи
+        # (у BoE своя DocumentRecord)
+        line = _dumps_line(dict(vars(record)))
+
+        with self._conn(record.source):
+            if self.exists(record.source, record.doc_id):
+                return False
+            self._jsonl_file(record.source).write(line)
+            self.mark_seen(record.source, record.doc_id)
+        return True
 
 
     def put_text(self, source: str, doc_id: str, text: str, ext: str = "txt") -> str:
         
         return text or ""
 
+    # http cache
 
-    def _normalize_pdf_url(self, pdf_url: str) -> str:
+    def get_cached_page(self, source: str, url: str) -> tuple[str | None, str | None, str] | None:
         """
-
+        (etag, last_modified, html) of the last 200 response for url, if any.
         """
-        u = (pdf_url or "").strip()
-        if not u:
-            return u
-
-        parts = urlsplit(u)
-        q = parse_qsl(parts.query, keep_blank_values=True)
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        with self._conn(source) as conn:
+            cur = conn.execute(
+                "SELECT etag, last_modified, body FROM http_cache WHERE url_key = ?", (key,)
+            )
+            row = cur.fetchone()
 
-        q2 = []
-        for k, v in q:
-            if (k or "").lower() in self.DROP_QUERY_KEYS:
-                continue
-            q2.append((k, v))
+        if not row:
+            return None
+        etag, last_modified, body = row
+        return etag, last_modified, gzip.decompress(body).decode("utf-8")
 
-        q2.sort()
-        new_query = urlencode(q2, doseq=True)
+    def put_cached_page(
+        self,
+        source: str,
+        url: str,
+        html: str,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        body = gzip.compress(html.encode("utf-8"))
+        with self._conn(source) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO http_cache(url_key, etag, last_modified, body) VALUES (?, ?, ?, ?)",
+                (key, etag, last_modified, body),
+            )
 
-        return urlunsplit((parts.scheme, parts.netloc, parts.path, new_query, ""))
 
-    def _pdf_key(self, pdf_url: str) -> str:
-        norm = self._normalize_pdf_url(pdf_url)
-        return hashlib.sha1(norm.encode("utf-8")).hexdigest()
+    def _pdf_paths(self, source: str) -> dict[str, str]:
+        paths = self._pdf_cache.get(source)
+        if paths is None:
+            with self._conn(source) as conn:
+                paths = self._pdf_cache.get(source)
+                if paths is None:
+                    paths = dict(conn.execute("SELECT pdf_key, path FROM pdf_seen"))
+                    if any(len(k) == 40 for k in paths):
+                        self._pdf_legacy.add(source)
+                    self._pdf_cache[source] = paths
+        return paths
 
-    def _pdf_name_from_url(self, pdf_url: str) -> str | None:
+    def pdf_seen(self, source: str, pdf_url: str) -> bool:
         """
- 
         """
-        try:
-            u = (pdf_url or "").strip()
-            if not u:
-                return None
+        return self._pdf_seen_path(source, pdf_url) is not None
 
-            parts = urlsplit(u)
-            path = parts.path or ""
-            last = unquote(path.split("/")[-1]).strip()
-
-            
-            if last.lower().endswith(".pdf") and len(last) >= 5:
-                return _safe_filename(last)
+    def _pdf_seen_path(self, source: str, pdf_url: str) -> str | None:
+        paths = self._pdf_paths(source)
+        path = paths.get(_pdf_key(pdf_url))
+        if path is None and source in self._pdf_legacy:
+            path = paths.get(_legacy_pdf_key(pdf_url))
+        return path
 
-           
-            if "/printpdf/" in path:
-                if last and last.lower() not in self.BAD_LAST_SEGMENTS:
-                    return _safe_filename(last + ".pdf")
+    # pdf
 
+    def _pdf_path(self, source: str, doc_id: str, pdf_url: str) -> Path:
+        d = self._source_dir(source) / "pdf"
 
-            if last and last.lower() not in self.BAD_LAST_SEGMENTS:
-              
-                if re.fullmatch(r"[A-Za-z0-9][A-Za-z0-9._\-]{2,}", last):
-                    return _safe_filename(last + ".pdf")
+        name = _pdf_name_from_url(pdf_url)
+        if not name:
+            name = _safe_filename(f"{doc_id}.pdf")
 
-        except Exception:
-            pass
+        return d / name
 
+    def _pdf_on_disk(self, source: str, pdf_url: str) -> str | None:
+        prev = self._pdf_seen_path(source, pdf_url)
+        if not prev:
+            return None
+        if prev in self._known_pdf_paths:
+            return prev
+        if os.path.exists(prev):
+            self._known_pdf_paths.add(prev)
+            return prev
         return None
 
-    def pdf_seen(self, source: str, pdf_url: str) -> bool:
+    def _register_pdf(self, source: str, pdf_url: str, path: Path) -> None:
+        key = _pdf_key(pdf_url)
+        paths = self._pdf_paths(source)
+        with self._conn(source) as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO pdf_seen(pdf_key, path) VALUES (?, ?)",
+                (key, str(path)),
+            )
+            paths.setdefault(key, str(path))
+            self._known_pdf_paths.add(str(path))
+
+    def put_pdf(
+        self,
+        source: str,
+        doc_id: str,
+        pdf_url: str,
+        content: bytes | bytearray,
+        idx: int | None = None,
+    ) -> str:
         """
         """
-        key = self._pdf_key(pdf_url)
-        conn = self._db(source)
-        try:
-            cur = conn.execute("SELECT 1 FROM pdf_seen WHERE pdf_key = ?", (key,))
-            return cur.fetchone() is not None
-        finally:
-            conn.close()
+        prev = self._pdf_on_disk(source, pdf_url)
+        if prev:
+            return prev
 
-    def _pdf_seen_path(self, source: str, pdf_url: str) -> str | None:
-        key = self._pdf_key(pdf_url)
-        conn = self._db(source)
-        try:
-            cur = conn.execute("SELECT path FROM pdf_seen WHERE pdf_key = ?", (key,))
-            row = cur.fetchone()
-            return row[0] if row else None
-        finally:
-            conn.close()
+        path = self._pdf_path(source, doc_id, pdf_url)
+        if not path.exists():
+            with path.open("wb") as f:
+                f.write(content)
+                f.flush()
+                _drop_page_cache(f.fileno(), len(content))
 
-    # pdf
+        self._register_pdf(source, pdf_url, path)
+        return str(path)
 
-    def put_pdf(
+    def put_pdf_stream(
         self,
         source: str,
         doc_id: str,
         pdf_url: str,
-        content: bytes,
+        chunks: Iterable[bytes],
         idx: int | None = None,
     ) -> str:
         """
+        Как put_pdf, но тело приходит кусками (r.iter_content) и пишется сразу на диск
+        через временный .part файл - PDF целиком в памяти не держится.
+        Пустое тело - ValueError, файл не создаётся.
         """
-        prev = self._pdf_seen_path(source, pdf_url)
-        if prev and Path(prev).exists():
+        prev = self._pdf_on_disk(source, pdf_url)
+        if prev:
             return prev
 
-        d = self._source_dir(source) / "pdf"
-
-        name = self._pdf_name_from_url(pdf_url)
-        if not name:
-            name = _safe_filename(f"{doc_id}.pdf")
-
-        path = d / name
+        path = self._pdf_path(source, doc_id, pdf_url)
         if not path.exists():
-            path.write_bytes(content)
-
-        key = self._pdf_key(pdf_url)
-        conn = self._db(source)
-        try:
-            conn.execute(
-                "INSERT OR IGNORE INTO pdf_seen(pdf_key, path) VALUES (?, ?)",
-                (key, str(path)),
-            )
-            conn.commit()
-        finally:
-            conn.close()
-
-        return str(path)
\ No newline at end of file
+            tmp = path.with_name(path.name + ".part")
+            size = 0
+            try:
+                with tmp.open("wb") as f:
+                    for chunk in chunks:
+                        if chunk:
+                            f.write(chunk)
+                            size += len(chunk)
+                    f.flush()
+                    _drop_page_cache(f.fileno(), size)
+                if not size:
+                    raise ValueError(f"empty PDF body: {pdf_url}")
+                os.replace(tmp, path)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+
+        self._register_pdf(source, pdf_url, path)
+        return str(path)